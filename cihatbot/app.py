@@ -1,10 +1,13 @@
 from __future__ import annotations
-from cihatbot.user import User
+from cihatbot.user import User, EXCHANGES, MARKETS
 from cihatbot.logger import Logger
 from cihatbot.events import Event, EventListener, AddUserEvent
 from cihatbot.scheduler import Scheduler
+from cihatbot.connector.market import Market
+from cihatbot.ui.webhook import WebhookServer
 from configparser import ConfigParser
-from typing import Dict, List
+from threading import Lock
+from typing import Dict, List, Optional
 from signal import signal, SIGINT, SIGTERM
 import logging
 
@@ -22,9 +25,14 @@ class Application:
         self.config: ConfigParser = ConfigParser()
         self.config.read(config_file)
 
-        self.listener: EventListener = EventListener()
+        self.listener: EventListener = EventListener([AddUserEvent])
         self.scheduler: Scheduler = Scheduler()
         self.users: List[User] = []
+        self.markets: Dict[str, Market] = {}
+        self.markets_lock: Lock = Lock()
+        self.webhook: Optional[WebhookServer] = None
+        if self.config["app"].get("webhook_port"):
+            self.webhook = WebhookServer(self.config["app"].get("webhook_host", "127.0.0.1"), int(self.config["app"]["webhook_port"]))
 
         self.logger.log(logging.INFO, "Initialization complete")
 
@@ -39,8 +47,8 @@ class Application:
         if not connector_name:
             connector_name = self.config["app"]["connector"]
 
-        user = User(self.listener, self.config)
-        user.add_ui(ui_name, parser_name, ui_config)
+        user = User(self.listener, self.config, self.get_market, self.webhook)
+        user.add_ui(ui_name, parser_name, ui_config, connector_name)
         user.add_trader(trader_name, connector_name, trader_config)
 
         self.users.append(user)
@@ -49,9 +57,20 @@ class Application:
         self.logger.log(logging.INFO, "Created new user")
         return user
 
+    def get_market(self, connector_name: str) -> Market:
+        """ Market data of the exchange behind connector_name, created once and shared by all users """
+
+        exchange = EXCHANGES[connector_name]
+        with self.markets_lock:
+            if exchange not in self.markets:
+                self.markets[exchange] = MARKETS[exchange]()
+            return self.markets[exchange]
+
     def run(self) -> None:
 
         self.logger.log(logging.INFO, "Starting cihat-bot")
+        if self.webhook:
+            self.webhook.start()
         self.scheduler.start()
         self.logger.log(logging.INFO, "Cihat-bot started")
 
@@ -59,12 +78,14 @@ class Application:
 
         self.logger.log(logging.INFO, "Stopping cihat-bot")
         self.scheduler.stop()
+        if self.webhook:
+            self.webhook.stop()
         self.logger.log(logging.INFO, "Cihat-bot stopped")
 
     def on_event(self, event: Event) -> None:
 
         if event.is_type(AddUserEvent):
-            self.add_user(event.data["ui"], event.data["parser"], event.data["trader"], event.data["connector"], event.data["ui_config"], event.data["trader_config"])
+            self.add_user(event.ui, event.parser, event.trader, event.connector, event.ui_config, event.trader_config)
 
     def exit(self, signum, frame):
 
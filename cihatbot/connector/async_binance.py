@@ -0,0 +1,133 @@
+from __future__ import annotations
+from cihatbot.connector.connector import ConnectorException
+from cihatbot.connector.binance import BinanceConnector, BinanceMarket
+from cihatbot.connector.rate_limiter import RequestScheduler, RateLimitExceeded
+from cihatbot.execution_order.execution_order import SingleExecutionOrder
+from binance.client import Client
+from threading import Thread
+from typing import Coroutine, Dict, List, Optional, Union
+from urllib.parse import urlencode
+import aiohttp
+import asyncio
+import hashlib
+import hmac
+import time
+
+
+class AsyncBinanceConnector(BinanceConnector):
+    """
+    Binance connector making its REST calls from an asyncio loop running in its own
+    thread, over a pooled keep-alive aiohttp session. submit_all sends all the
+    orders concurrently, so a batch costs about one round-trip instead of one per
+    order. The user data socket is still handled by BinanceConnector.
+    """
+
+    API_URL = "https://api.binance.com/api/v3"
+    POOL_SIZE = 32
+    TIMEOUT = 10
+
+    def __init__(self, market: BinanceMarket):
+
+        super().__init__(market)
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self.thread: Thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.secret: bytes = b""
+
+    def connect(self, key: str, secret: str) -> None:
+
+        super().connect(key, secret)
+        self.secret = secret.encode()
+        if not self.thread.is_alive():
+            self.thread.start()
+        self._run(self._open_session(key))
+
+    def stop_listen(self):
+
+        super().stop_listen()
+        if self.session:
+            self._run(self.session.close())
+            self.session = None
+
+    def submit(self, execution_order: SingleExecutionOrder) -> int:
+        return self._run(self._submit(execution_order))
+
+    def submit_all(self, execution_orders: List[SingleExecutionOrder]) -> List[Union[int, ConnectorException]]:
+        return self._run(self._submit_all(execution_orders))
+
+    def is_filled(self, execution_order: SingleExecutionOrder) -> bool:
+
+        binance_order = self._run(self._order_request("GET", execution_order, RequestScheduler.PRIORITY_QUERY, AsyncBinanceConnector.WEIGHT_QUERY))
+        return binance_order["status"] == Client.ORDER_STATUS_FILLED
+
+    def cancel(self, execution_order: SingleExecutionOrder) -> None:
+        self._run(self._order_request("DELETE", execution_order, RequestScheduler.PRIORITY_CANCEL, AsyncBinanceConnector.WEIGHT_CANCEL))
+
+    def _run(self, coroutine: Coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _open_session(self, key: str) -> None:
+
+        if self.session:
+            await self.session.close()
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=AsyncBinanceConnector.POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(total=AsyncBinanceConnector.TIMEOUT),
+            headers={"X-MBX-APIKEY": key}
+        )
+
+    async def _submit_all(self, execution_orders: List[SingleExecutionOrder]) -> List[Union[int, ConnectorException]]:
+        return await asyncio.gather(*[self._try_submit(execution_order) for execution_order in execution_orders])
+
+    async def _try_submit(self, execution_order: SingleExecutionOrder) -> Union[int, ConnectorException]:
+
+        try:
+            return await self._submit(execution_order)
+        except ConnectorException as exception:
+            return exception
+
+    async def _submit(self, execution_order: SingleExecutionOrder) -> int:
+
+        try:
+            binance_order = await self._request(
+                "POST", self._order_params(execution_order),
+                RequestScheduler.PRIORITY_SUBMIT, AsyncBinanceConnector.WEIGHT_SUBMIT, 1
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError, AsyncBinanceException) as exception:
+            raise ConnectorException(str(exception), execution_order)
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_order, exception.delay)
+
+        return binance_order["orderId"]
+
+    async def _order_request(self, method: str, execution_order: SingleExecutionOrder, priority: int, weight: int) -> Dict:
+
+        params = {"symbol": execution_order.params.symbol, "orderId": execution_order.external_id}
+        try:
+            return await self._request(method, params, priority, weight)
+        except (aiohttp.ClientError, asyncio.TimeoutError, AsyncBinanceException) as exception:
+            raise ConnectorException(str(exception), execution_order)
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_order, exception.delay)
+
+    async def _request(self, method: str, params: Dict, priority: int, weight: int, orders: int = 0) -> Dict:
+
+        if not self.session:
+            raise AsyncBinanceException("Not connected")
+
+        self.scheduler.acquire(priority, weight, orders)
+
+        query = urlencode({**params, "timestamp": int(time.time() * 1000)})
+        signature = hmac.new(self.secret, query.encode(), hashlib.sha256).hexdigest()
+        url = f"""{AsyncBinanceConnector.API_URL}/order?{query}&signature={signature}"""
+
+        async with self.session.request(method, url) as response:
+            self.scheduler.update(response.headers, response.status)
+            data = await response.json()
+            if response.status >= 400:
+                raise AsyncBinanceException(data.get("msg", str(response.status)))
+            return data
+
+
+class AsyncBinanceException(Exception):
+    pass
@@ -1,23 +1,105 @@
 from __future__ import annotations
 from cihatbot.events import UserEvent, TickerEvent
 from cihatbot.connector.connector import Connector, ConnectorException
+from cihatbot.connector.market import Market
+from cihatbot.connector.rate_limiter import RequestScheduler, WeightLimit, RateLimitExceeded
 from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionConditions, ExecutionParams
 from binance.client import Client
 from binance.exceptions import BinanceOrderException, BinanceRequestException, BinanceAPIException
 from binance.websockets import BinanceSocketManager
-from typing import Callable, Dict, List
+from requests.exceptions import RequestException
+from threading import Thread
+from typing import Callable, Dict, List, Optional, Tuple
+import time
+
+
+class BinanceMarket(Market):
+    """ Also holds the request weight limit, which Binance counts per IP and so for all the connectors together """
+
+    FILTERS_REFRESH = 3600
+    FILTERS_RETRY = 60
+    WEIGHT_EXCHANGE_INFO = 10
+
+    def __init__(self) -> None:
+
+        super().__init__()
+        self.socket = None
+        self.weight: WeightLimit = WeightLimit()
+        self.filters_thread: Thread = Thread(target=self._refresh_filters, daemon=True)
+        self.filters_thread.start()
+
+    def _refresh_filters(self) -> None:
+        """ Loads the exchange filters once, then keeps them fresh without blocking parsing """
+
+        client = None
+        while True:
+            delay = BinanceMarket.FILTERS_REFRESH
+            try:
+                if client is None:
+                    client = Client("", "")
+                self.weight.acquire(BinanceMarket.WEIGHT_EXCHANGE_INFO, RequestScheduler.WEIGHT_SHARES[RequestScheduler.PRIORITY_QUERY])
+                self.filters.load(client.get_exchange_info())
+            except RateLimitExceeded as exception:
+                delay = exception.delay
+            except (BinanceRequestException, BinanceAPIException, RequestException):
+                delay = BinanceMarket.FILTERS_RETRY
+
+            response = getattr(client, "response", None)
+            if response is not None:
+                self.weight.update(response.headers, response.status_code)
+            time.sleep(delay)
+
+    def open(self) -> None:
+
+        self.socket = BinanceSocketManager(Client("", ""))
+        self.socket.start_miniticker_socket(self.ticker_handler)
+        self.socket.daemon = True
+        self.socket.start()
+
+    def ticker_handler(self, message: List[Dict]):
+
+        symbols = []
+        for ticker in message:
+
+            message_type = ticker["e"]
+            if not message_type == "24hrMiniTicker":
+                continue
+
+            symbol = ticker["s"]
+            if self.prices.update(symbol, float(ticker["c"]), float(ticker["v"]), ticker["E"] / 1000):
+                symbols.append(symbol)
+
+        if symbols:
+            self.emit(TickerEvent(symbols))
+
+    def close(self) -> None:
+
+        if self.socket:
+            self.socket.close()
+            self.socket = None
 
 
 class BinanceConnector(Connector):
 
     BINANCE_ORDER_STATUS_FILLED = "FILLED"
     BINANCE_ORDER_STATUS_CANCELED = "CANCELED"
+    BINANCE_ORDER_STATUS_EXPIRED = "EXPIRED"
+    BINANCE_ORDER_STATUS_REJECTED = "REJECTED"
+    BINANCE_ERROR_UNKNOWN_ORDER = -2013
 
-    def __init__(self):
+    WEIGHT_SUBMIT = 1
+    WEIGHT_QUERY = 2
+    WEIGHT_CANCEL = 1
+    WEIGHT_ALL_ORDERS = 10
 
-        super().__init__()
+    ALL_ORDERS_LIMIT = 1000
+
+    def __init__(self, market: BinanceMarket):
+
+        super().__init__(market)
         self.client: Client = Client("", "")
         self.socket = BinanceSocketManager(self.client)
+        self.scheduler: RequestScheduler = RequestScheduler(market.weight)
         self.connected: bool = False
 
     def connect(self, key: str, secret: str) -> None:
@@ -32,9 +114,9 @@ class BinanceConnector(Connector):
             return
 
         self.socket.start_user_socket(self.user_handler)
-        self.socket.start_miniticker_socket(self.ticker_handler)
         self.socket.daemon = True
         self.socket.start()
+        super().start_listen()
 
     def user_handler(self, message: Dict):
 
@@ -46,75 +128,147 @@ class BinanceConnector(Connector):
         binance_order_status = message["X"]
 
         if binance_order_status == BinanceConnector.BINANCE_ORDER_STATUS_FILLED:
-            self.emit(UserEvent({"external_id": order_id, "status": BinanceConnector.ORDER_STATUS_FILLED}))
+            self.emit(UserEvent(order_id, BinanceConnector.ORDER_STATUS_FILLED))
         elif binance_order_status == BinanceConnector.BINANCE_ORDER_STATUS_CANCELED:
-            self.emit(UserEvent({"external_id": order_id, "status": BinanceConnector.ORDER_STATUS_CANCELED}))
-
-    def ticker_handler(self, message: List[Dict]):
-
-        for ticker in message:
-
-            message_type = ticker["e"]
-            if not message_type == "24hrMiniTicker":
-                continue
-
-        self.emit(TickerEvent({}))
+            self.emit(UserEvent(order_id, BinanceConnector.ORDER_STATUS_CANCELED))
 
     def stop_listen(self):
 
         self.socket.close()
+        super().stop_listen()
 
-    def satisfied(self, execution_order: SingleExecutionOrder) -> bool:
+    def submit(self, execution_order: SingleExecutionOrder) -> int:
 
-        execution_conditions = execution_order.conditions
-        return True
+        params = self._order_params(execution_order)
 
-    def submit(self, execution_order: SingleExecutionOrder) -> int:
+        try:
+            binance_order = self._call(self.client.create_order, RequestScheduler.PRIORITY_SUBMIT, BinanceConnector.WEIGHT_SUBMIT, 1, **params)
+        except (BinanceRequestException, BinanceOrderException, BinanceAPIException) as exception:
+            raise ConnectorException(exception.message, execution_order)
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_order, exception.delay)
+
+        return binance_order["orderId"]
+
+    @staticmethod
+    def _order_params(execution_order: SingleExecutionOrder) -> Dict:
 
         execution_params = execution_order.params
 
-        side = self.client.SIDE_BUY
+        side = Client.SIDE_BUY
         if execution_params.command == ExecutionParams.CMD_SELL:
-            side = self.client.SIDE_SELL
+            side = Client.SIDE_SELL
 
         params = {
             "newClientOrderId": execution_order.order_id,
             "symbol": execution_params.symbol,
             "quantity": execution_params.quantity,
             "side": side,
-            "type": self.client.ORDER_TYPE_MARKET
+            "type": Client.ORDER_TYPE_MARKET
         }
 
         if not execution_params.price == 0:
-            params["type"] = self.client.ORDER_TYPE_LIMIT
+            params["type"] = Client.ORDER_TYPE_LIMIT
             params["price"] = execution_params.price
-            params["timeInForce"] = self.client.TIME_IN_FORCE_GTC
-
-        try:
-            binance_order = self.client.create_order(**params)
-        except (BinanceRequestException, BinanceOrderException, BinanceAPIException) as exception:
-            raise ConnectorException(exception.message, execution_order)
+            params["timeInForce"] = Client.TIME_IN_FORCE_GTC
 
-        return binance_order["orderId"]
+        return params
 
     def is_filled(self, execution_order: SingleExecutionOrder) -> bool:
+        return self._get_order(execution_order)["status"] == BinanceConnector.BINANCE_ORDER_STATUS_FILLED
+
+    def _get_order(self, execution_order: SingleExecutionOrder) -> Dict:
 
         try:
-            binance_order = self.client.get_order(
+            return self._call(
+                self.client.get_order, RequestScheduler.PRIORITY_QUERY, BinanceConnector.WEIGHT_QUERY,
                 symbol=execution_order.params.symbol,
                 orderId=execution_order.external_id
             )
         except (BinanceRequestException, BinanceAPIException) as exception:
             raise ConnectorException(exception.message, execution_order)
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_order, exception.delay)
 
-        return binance_order["status"] == self.client.ORDER_STATUS_FILLED
+    def find(self, execution_order: SingleExecutionOrder) -> Optional[Tuple[int, str]]:
+
+        try:
+            binance_order = self._call(
+                self.client.get_order, RequestScheduler.PRIORITY_QUERY, BinanceConnector.WEIGHT_QUERY,
+                symbol=execution_order.params.symbol,
+                origClientOrderId=execution_order.order_id
+            )
+        except BinanceAPIException as exception:
+            if exception.code == BinanceConnector.BINANCE_ERROR_UNKNOWN_ORDER:
+                return None
+            raise ConnectorException(exception.message, execution_order)
+        except BinanceRequestException as exception:
+            raise ConnectorException(exception.message, execution_order)
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_order, exception.delay)
+
+        return binance_order["orderId"], BinanceConnector._order_status(binance_order["status"])
+
+    @staticmethod
+    def _order_status(binance_order_status: str) -> str:
+        if binance_order_status == BinanceConnector.BINANCE_ORDER_STATUS_FILLED:
+            return BinanceConnector.ORDER_STATUS_FILLED
+        if binance_order_status in (BinanceConnector.BINANCE_ORDER_STATUS_CANCELED, BinanceConnector.BINANCE_ORDER_STATUS_EXPIRED, BinanceConnector.BINANCE_ORDER_STATUS_REJECTED):
+            return BinanceConnector.ORDER_STATUS_CANCELED
+        return BinanceConnector.ORDER_STATUS_OPEN
 
     def cancel(self, execution_order: SingleExecutionOrder) -> None:
 
         try:
-            self.client.cancel_order(
+            self._call(
+                self.client.cancel_order, RequestScheduler.PRIORITY_CANCEL, BinanceConnector.WEIGHT_CANCEL,
                 symbol=execution_order.params.symbol,
                 orderId=execution_order.external_id
             )
         except (BinanceRequestException, BinanceAPIException) as exception:
             raise ConnectorException(exception.message, execution_order)
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_order, exception.delay)
+
+    def order_statuses(self, symbol: str, execution_orders: List[SingleExecutionOrder]) -> Dict[int, str]:
+        """
+        One allOrders call from the oldest order of the symbol returns the final status
+        of up to ALL_ORDERS_LIMIT orders, only the orders past that window are queried
+        one by one
+        """
+
+        try:
+            binance_orders = self._call(
+                self.client.get_all_orders, RequestScheduler.PRIORITY_QUERY, BinanceConnector.WEIGHT_ALL_ORDERS,
+                symbol=symbol,
+                orderId=min(execution_order.external_id for execution_order in execution_orders),
+                limit=BinanceConnector.ALL_ORDERS_LIMIT
+            )
+        except (BinanceRequestException, BinanceAPIException) as exception:
+            raise ConnectorException(exception.message, execution_orders[0])
+        except RateLimitExceeded as exception:
+            raise ConnectorException(str(exception), execution_orders[0], exception.delay)
+
+        binance_statuses = {binance_order["orderId"]: binance_order["status"] for binance_order in binance_orders}
+
+        statuses = {}
+        for execution_order in execution_orders:
+            external_id = execution_order.external_id
+            binance_status = binance_statuses.get(external_id)
+            if binance_status is None:
+                binance_status = self._get_order(execution_order)["status"]
+            status = BinanceConnector._order_status(binance_status)
+            if not status == BinanceConnector.ORDER_STATUS_OPEN:
+                statuses[external_id] = status
+        return statuses
+
+    def _call(self, request: Callable, priority: int, weight: int, orders: int = 0, **params) -> Dict:
+        """ Makes a REST call if the scheduler admits it, then feeds the response headers back """
+
+        self.scheduler.acquire(priority, weight, orders)
+        try:
+            return request(**params)
+        finally:
+            response = getattr(self.client, "response", None)
+            if response is not None:
+                self.scheduler.update(response.headers, response.status_code)
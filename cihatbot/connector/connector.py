@@ -1,45 +1,121 @@
-from cihatbot.events import Event, EventEmitter, EventListener
+from __future__ import annotations
+from cihatbot.events import Event, EventEmitter, EventListener, UserEvent
+from cihatbot.connector.market import Market
+from cihatbot.connector.price_cache import PriceCache
 from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionConditions, ExecutionParams
-from typing import Callable
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 
 class Connector:
 
+    ORDER_STATUS_OPEN = "OPEN"
     ORDER_STATUS_FILLED = "FILLED"
     ORDER_STATUS_CANCELED = "CANCELED"
 
-    def __init__(self):
+    def __init__(self, market: Market):
         self.emitter: EventEmitter = EventEmitter()
+        self.listeners: List[EventListener] = []
+        self.market: Market = market
+        self.prices: PriceCache = market.prices
+        self.listening: bool = False
 
     def add_listener(self, listener: EventListener):
         self.emitter.add_listener(listener)
+        self.listeners.append(listener)
 
-    def emit(self, event: Event):
-        self.emitter.emit(event)
+    def emit(self, event: Event, block: bool = True):
+        self.emitter.emit(event, block)
 
     def connect(self, key: str, secret: str) -> None:
         pass
 
     def start_listen(self):
-        pass
+        if self.listening:
+            return
+        self.listening = True
+        for listener in self.listeners:
+            self.market.subscribe(listener)
 
     def stop_listen(self):
-        pass
+        if not self.listening:
+            return
+        self.listening = False
+        for listener in self.listeners:
+            self.market.unsubscribe(listener)
 
     def satisfied(self, execution_order: SingleExecutionOrder) -> bool:
-        pass
+        return execution_order.conditions.satisfied(self.prices.price(execution_order.params.symbol))
 
     def submit(self, execution_order: SingleExecutionOrder) -> int:
         pass
 
+    def submit_all(self, execution_orders: List[SingleExecutionOrder]) -> List[Union[int, ConnectorException]]:
+        """ Submits every order, returning for each one its external id or the error it raised """
+
+        results = []
+        for execution_order in execution_orders:
+            try:
+                results.append(self.submit(execution_order))
+            except ConnectorException as exception:
+                results.append(exception)
+        return results
+
     def is_filled(self, execution_order: SingleExecutionOrder) -> bool:
         pass
 
     def cancel(self, execution_order: SingleExecutionOrder) -> None:
         pass
 
+    def reconcile(self, execution_orders: List[SingleExecutionOrder]) -> List[ConnectorException]:
+        """
+        Emits a UserEvent for each submitted order that was filled or cancelled while
+        nobody was listening, querying the exchange once per symbol instead of once
+        per order. Returns the errors of the symbols that could not be checked.
+        """
+
+        symbols: Dict[str, List[SingleExecutionOrder]] = {}
+        for execution_order in execution_orders:
+            symbols.setdefault(execution_order.params.symbol, []).append(execution_order)
+
+        errors = []
+        for symbol, orders in symbols.items():
+            try:
+                statuses = self.order_statuses(symbol, orders)
+            except ConnectorException as exception:
+                errors.append(exception)
+                continue
+            for external_id, status in statuses.items():
+                self.emit(UserEvent(external_id, status))
+        return errors
+
+    def find(self, execution_order: SingleExecutionOrder) -> Optional[Tuple[int, str]]:
+        """
+        Looks an order up by its order_id, sent as the client order id, returning its
+        external id and ORDER_STATUS_OPEN, ORDER_STATUS_FILLED or ORDER_STATUS_CANCELED,
+        or None if the exchange never received it
+        """
+        return None
+
+    def lookup(self, execution_orders: List[SingleExecutionOrder]) -> List[Union[Tuple[int, str], None, ConnectorException]]:
+        """ Finds every order, returning for each one the result of find or the error it raised """
+
+        results = []
+        for execution_order in execution_orders:
+            try:
+                results.append(self.find(execution_order))
+            except ConnectorException as exception:
+                results.append(exception)
+        return results
+
+    def order_statuses(self, symbol: str, execution_orders: List[SingleExecutionOrder]) -> Dict[int, str]:
+        """ Maps the external id of each order of symbol that is no longer open to ORDER_STATUS_FILLED or ORDER_STATUS_CANCELED """
+        return {}
+
 
 class ConnectorException(Exception):
-    def __init__(self, message: str, order: SingleExecutionOrder):
+    """ retry_in is set when the call was not made because of a rate limit, and can be retried after that many seconds """
+
+    def __init__(self, message: str, order: SingleExecutionOrder, retry_in: float = 0.0):
         self.message = message
         self.order = order
+        self.retry_in = retry_in
@@ -0,0 +1,106 @@
+from cihatbot.connector.price_cache import PriceCache
+from cihatbot.execution_order.execution_order import ExecutionParams
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+from typing import Dict, List, Optional
+
+
+class SymbolFilters:
+    """ Trading rules of a symbol: PRICE_FILTER, LOT_SIZE and MIN_NOTIONAL """
+
+    def __init__(self, tick_size: str = "0", min_price: str = "0", max_price: str = "0",
+                 step_size: str = "0", min_quantity: str = "0", max_quantity: str = "0",
+                 min_notional: str = "0") -> None:
+
+        self.tick_size: Decimal = Decimal(tick_size).normalize()
+        self.min_price: float = float(min_price)
+        self.max_price: float = float(max_price)
+        self.step_size: Decimal = Decimal(step_size).normalize()
+        self.min_quantity: float = float(min_quantity)
+        self.max_quantity: float = float(max_quantity)
+        self.min_notional: float = float(min_notional)
+
+    @staticmethod
+    def from_exchange_info(filters: List[Dict]) -> "SymbolFilters":
+
+        params = {}
+        for symbol_filter in filters:
+            filter_type = symbol_filter["filterType"]
+            if filter_type == "PRICE_FILTER":
+                params["tick_size"] = symbol_filter["tickSize"]
+                params["min_price"] = symbol_filter["minPrice"]
+                params["max_price"] = symbol_filter["maxPrice"]
+            elif filter_type == "LOT_SIZE":
+                params["step_size"] = symbol_filter["stepSize"]
+                params["min_quantity"] = symbol_filter["minQty"]
+                params["max_quantity"] = symbol_filter["maxQty"]
+            elif filter_type == "MIN_NOTIONAL" or filter_type == "NOTIONAL":
+                params["min_notional"] = symbol_filter["minNotional"]
+        return SymbolFilters(**params)
+
+    def apply(self, params: ExecutionParams, last_price: Optional[float]) -> ExecutionParams:
+        """
+        Rounds price to the tick in the user's favour, down for buys and up for sells,
+        and quantity down to the step, raises FilterException if still invalid
+        """
+
+        price_rounding = ROUND_UP if params.command == ExecutionParams.CMD_SELL else ROUND_DOWN
+        price = SymbolFilters._round(params.price, self.tick_size, price_rounding)
+        quantity = SymbolFilters._round(params.quantity, self.step_size, ROUND_DOWN)
+
+        if not params.price == 0 and price == 0:
+            raise FilterException(f"""Price below the tick size {self.tick_size}""")
+        if not price == 0:
+            if price < self.min_price:
+                raise FilterException(f"""Price below {self.min_price}""")
+            if self.max_price and price > self.max_price:
+                raise FilterException(f"""Price above {self.max_price}""")
+
+        if quantity <= 0 or quantity < self.min_quantity:
+            raise FilterException(f"""Quantity below {self.min_quantity}""")
+        if self.max_quantity and quantity > self.max_quantity:
+            raise FilterException(f"""Quantity above {self.max_quantity}""")
+
+        notional_price = price or last_price
+        if notional_price and notional_price * quantity < self.min_notional:
+            raise FilterException(f"""Order value below {self.min_notional}""")
+
+        return ExecutionParams(params.command, params.symbol, price, quantity)
+
+    @staticmethod
+    def _round(value: float, step: Decimal, rounding: str) -> float:
+        if not step:
+            return value
+        return float((Decimal(str(value)) / step).to_integral_value(rounding) * step)
+
+
+class ExchangeFilters:
+    """ Filters of every symbol of an exchange, replaced as a whole on each refresh """
+
+    def __init__(self, prices: PriceCache) -> None:
+        self.prices: PriceCache = prices
+        self.symbols: Dict[str, SymbolFilters] = {}
+
+    def load(self, exchange_info: Dict) -> None:
+        self.symbols = {
+            symbol_info["symbol"]: SymbolFilters.from_exchange_info(symbol_info["filters"])
+            for symbol_info in exchange_info["symbols"]
+        }
+
+    def is_loaded(self) -> bool:
+        return bool(self.symbols)
+
+    def validate(self, params: ExecutionParams) -> ExecutionParams:
+        """ Returns params rounded to the symbol's filters, unchanged if they are not loaded yet """
+
+        if not self.is_loaded():
+            return params
+
+        filters = self.symbols.get(params.symbol)
+        if not filters:
+            raise FilterException(f"""Unknown symbol {params.symbol}""")
+        return filters.apply(params, self.prices.price(params.symbol))
+
+
+class FilterException(Exception):
+    def __init__(self, message: str):
+        self.message = message
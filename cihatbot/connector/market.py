@@ -0,0 +1,42 @@
+from cihatbot.events import Event, EventEmitter, EventListener
+from cihatbot.connector.price_cache import PriceCache
+from cihatbot.connector.filters import ExchangeFilters
+from threading import Lock
+
+
+class Market:
+    """
+    Public market data of an exchange, shared by all the connectors (and users)
+    trading on it. The stream is opened with the first subscriber and closed with
+    the last one, decoded once into prices and fanned out as TickerEvents.
+    """
+
+    def __init__(self) -> None:
+        self.prices: PriceCache = PriceCache()
+        self.filters: ExchangeFilters = ExchangeFilters(self.prices)
+        self.emitter: EventEmitter = EventEmitter()
+        self.lock: Lock = Lock()
+        self.subscribers: int = 0
+
+    def subscribe(self, listener: EventListener) -> None:
+        with self.lock:
+            self.emitter.add_listener(listener)
+            self.subscribers += 1
+            if self.subscribers == 1:
+                self.open()
+
+    def unsubscribe(self, listener: EventListener) -> None:
+        with self.lock:
+            self.emitter.remove_listener(listener)
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                self.close()
+
+    def emit(self, event: Event) -> None:
+        self.emitter.emit(event)
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,63 @@
+from array import array
+from typing import Dict, NamedTuple, Optional
+
+
+class Price(NamedTuple):
+    price: float
+    volume: float
+    timestamp: float
+
+
+class PriceCache:
+    """
+    Last price, volume and timestamp of every symbol, stored column-wise in
+    arrays indexed by a per-symbol slot. Written by a single thread (the market
+    data socket) and read without locks by any other.
+    """
+
+    def __init__(self) -> None:
+        self.slots: Dict[str, int] = {}
+        self.prices: array = array("d")
+        self.volumes: array = array("d")
+        self.timestamps: array = array("d")
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.slots
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def update(self, symbol: str, price: float, volume: float, timestamp: float) -> bool:
+        """ Stores the new values in place, returns whether the price changed """
+
+        slot = self.slots.get(symbol)
+        if slot is None:
+            slot = self._allocate(symbol)
+            changed = True
+        else:
+            changed = not self.prices[slot] == price
+
+        self.prices[slot] = price
+        self.volumes[slot] = volume
+        self.timestamps[slot] = timestamp
+        return changed
+
+    def _allocate(self, symbol: str) -> int:
+        slot = len(self.prices)
+        self.prices.append(0.0)
+        self.volumes.append(0.0)
+        self.timestamps.append(0.0)
+        self.slots[symbol] = slot
+        return slot
+
+    def price(self, symbol: str) -> Optional[float]:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            return None
+        return self.prices[slot]
+
+    def get(self, symbol: str) -> Optional[Price]:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            return None
+        return Price(self.prices[slot], self.volumes[slot], self.timestamps[slot])
@@ -0,0 +1,123 @@
+from cihatbot.util.rate_limit import RateLimit
+from threading import Lock
+from typing import Dict, Mapping, Optional
+import time
+
+
+class WeightLimit:
+    """
+    Request weight of an exchange, which Binance counts per IP: a single instance
+    is shared through the market by all the connectors of the process, whatever
+    account they trade for, together with the pause that follows a 429/418.
+    """
+
+    WEIGHT_HEADER = "X-MBX-USED-WEIGHT-1M"
+    RETRY_AFTER_HEADER = "Retry-After"
+
+    def __init__(self, limit: int = 1200) -> None:
+        self.weight: RateLimit = RateLimit(limit, 60)
+        self.paused_until: float = 0.0
+        self.lock: Lock = Lock()
+
+    def acquire(self, weight: int, share: float = 1.0) -> None:
+        """ Accounts for a call that is not subject to order limits, raises RateLimitExceeded if it does not fit """
+
+        now = time.time()
+        with self.lock:
+            delay = self.delay(weight, now, share)
+            if delay is not None:
+                raise RateLimitExceeded(delay)
+            self.weight.consume(weight, now)
+
+    def delay(self, weight: int, now: float, share: float = 1.0) -> Optional[float]:
+        """ Seconds before a call of this weight fits in share of the limit, None if it fits now, to be called holding lock """
+
+        if self.paused_until > now:
+            return self.paused_until - now
+        if not self.weight.available(weight, now, share):
+            return self.weight.reset_in(now)
+        return None
+
+    def update(self, headers: Mapping[str, str], status: int = 200) -> None:
+        """ Syncs the usage with a response's headers (looked up case-insensitively) """
+
+        now = time.time()
+        with self.lock:
+            if WeightLimit.WEIGHT_HEADER in headers:
+                self.weight.sync(int(headers[WeightLimit.WEIGHT_HEADER]), now)
+            if status == 429 or status == 418:
+                retry_after = int(headers.get(WeightLimit.RETRY_AFTER_HEADER, 60))
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+
+class RequestScheduler:
+    """
+    Admits the REST calls of an account so that the request weight and order count
+    limits are never crossed. The weight is a WeightLimit shared with the other
+    accounts on the same IP, the order counts are the account's own. Calls never
+    wait: one that does not fit raises RateLimitExceeded with the delay after which
+    it would, so that the trader can defer it and keep handling events. Priorities
+    are kept by headroom, queries may only use part of the weight and submits a
+    larger part, so that cancels still go out when the others are held back.
+    Usage is corrected from the X-MBX-* headers of every response.
+    """
+
+    PRIORITY_CANCEL = 0
+    PRIORITY_SUBMIT = 1
+    PRIORITY_QUERY = 2
+
+    WEIGHT_SHARES: Dict[int, float] = {
+        PRIORITY_CANCEL: 1.0,
+        PRIORITY_SUBMIT: 0.9,
+        PRIORITY_QUERY: 0.8
+    }
+
+    ORDER_COUNT_10S_HEADER = "X-MBX-ORDER-COUNT-10S"
+    ORDER_COUNT_1D_HEADER = "X-MBX-ORDER-COUNT-1D"
+
+    def __init__(self, weight: WeightLimit = None, order_limit_10s: int = 50, order_limit_1d: int = 160000) -> None:
+        self.weight: WeightLimit = weight or WeightLimit()
+        self.orders_10s: RateLimit = RateLimit(order_limit_10s, 10)
+        self.orders_1d: RateLimit = RateLimit(order_limit_1d, 86400)
+        self.lock: Lock = Lock()
+
+    def acquire(self, priority: int, weight: int, orders: int = 0) -> None:
+        """ Accounts for the call if it fits in the limits, raises RateLimitExceeded otherwise """
+
+        now = time.time()
+        with self.lock, self.weight.lock:
+            delay = self._delay(priority, weight, orders, now)
+            if delay is not None:
+                raise RateLimitExceeded(delay)
+            self.weight.weight.consume(weight, now)
+            self.orders_10s.consume(orders, now)
+            self.orders_1d.consume(orders, now)
+
+    def update(self, headers: Mapping[str, str], status: int = 200) -> None:
+        """ Syncs the usage with a response's headers (looked up case-insensitively) """
+
+        self.weight.update(headers, status)
+        now = time.time()
+        with self.lock:
+            if RequestScheduler.ORDER_COUNT_10S_HEADER in headers:
+                self.orders_10s.sync(int(headers[RequestScheduler.ORDER_COUNT_10S_HEADER]), now)
+            if RequestScheduler.ORDER_COUNT_1D_HEADER in headers:
+                self.orders_1d.sync(int(headers[RequestScheduler.ORDER_COUNT_1D_HEADER]), now)
+
+    def _delay(self, priority: int, weight: int, orders: int, now: float) -> Optional[float]:
+        """ Seconds to wait before a call of this cost can go out, None if it can go now """
+
+        delay = self.weight.delay(weight, now, RequestScheduler.WEIGHT_SHARES[priority])
+        if delay is not None:
+            return delay
+        if not self.orders_10s.available(orders, now):
+            return self.orders_10s.reset_in(now)
+        if not self.orders_1d.available(orders, now):
+            return self.orders_1d.reset_in(now)
+        return None
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, delay: float):
+        super().__init__(f"""Rate limit reached, retry in {delay:.1f}s""")
+        self.delay = delay
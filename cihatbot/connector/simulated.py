@@ -0,0 +1,220 @@
+from __future__ import annotations
+from cihatbot.events import UserEvent, TickerEvent
+from cihatbot.connector.connector import Connector, ConnectorException
+from cihatbot.connector.market import Market
+from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionParams
+from itertools import count
+from random import Random
+from threading import Thread, Event as Flag, Lock
+from typing import Dict, List, Optional, Tuple, Iterable
+import heapq
+import time
+
+
+class SimulatedMarket(Market):
+    """
+    Offline market data: a random walk over PRICES while someone listens, or
+    prices replayed through feed(). Every price update is matched against the
+    books of the attached SimulatedConnectors before being emitted.
+    """
+
+    PRICES: Dict[str, float] = {
+        "BTCBUSD": 50000.0,
+        "ETHBUSD": 2000.0,
+        "ADABUSD": 1.0,
+        "DOTBUSD": 30.0,
+        "ATOMBUSD": 20.0
+    }
+    INTERVAL = 0.1
+    VOLATILITY = 0.001
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.connectors: List[SimulatedConnector] = []
+        self.random: Random = Random()
+        self.thread: Thread = Thread()
+        self.stopped: Flag = Flag()
+
+    def attach(self, connector: SimulatedConnector) -> None:
+        self.connectors = self.connectors + [connector]
+
+    def detach(self, connector: SimulatedConnector) -> None:
+        self.connectors = [attached for attached in self.connectors if attached is not connector]
+
+    def open(self) -> None:
+        self.stopped.clear()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def feed(self, symbol: str, price: float, volume: float = 0.0) -> None:
+        if self._update(symbol, price, volume):
+            self.emit(TickerEvent([symbol]))
+
+    def replay(self, ticks: Iterable[Tuple[str, float]]) -> None:
+        for symbol, price in ticks:
+            self.feed(symbol, price)
+
+    def _update(self, symbol: str, price: float, volume: float) -> bool:
+        if not self.prices.update(symbol, price, volume, time.time()):
+            return False
+        for connector in self.connectors:
+            connector.match(symbol, price)
+        return True
+
+    def _run(self) -> None:
+        while not self.stopped.wait(SimulatedMarket.INTERVAL):
+            symbols = []
+            for symbol, initial_price in SimulatedMarket.PRICES.items():
+                price = self.prices.price(symbol) or initial_price
+                price *= 1 + self.random.gauss(0, SimulatedMarket.VOLATILITY)
+                if self._update(symbol, price, 0.0):
+                    symbols.append(symbol)
+            if symbols:
+                self.emit(TickerEvent(symbols))
+
+
+class OrderBook:
+    """ Resting limit orders of a symbol, in price-time priority """
+
+    def __init__(self) -> None:
+        self.bids: List[Tuple[float, int]] = []
+        self.asks: List[Tuple[float, int]] = []
+
+    def add(self, external_id: int, command: str, price: float) -> None:
+        if command == ExecutionParams.CMD_BUY:
+            heapq.heappush(self.bids, (-price, external_id))
+        else:
+            heapq.heappush(self.asks, (price, external_id))
+
+    def match(self, price: float) -> List[int]:
+        """ Pops the buys priced at or above price and the sells at or below it """
+
+        matched = []
+        while self.bids and -self.bids[0][0] >= price:
+            matched.append(heapq.heappop(self.bids)[1])
+        while self.asks and self.asks[0][0] <= price:
+            matched.append(heapq.heappop(self.asks)[1])
+        return matched
+
+
+class SimulatedConnector(Connector):
+    """
+    Connector to an in-memory exchange: market orders and marketable limit orders
+    fill at the last price, the others rest in the symbol's OrderBook until the
+    price reaches them. Execution reports are emitted as UserEvents.
+    """
+
+    ORDER_STATUS_NEW = "NEW"
+
+    def __init__(self, market: Market):
+
+        super().__init__(market)
+        self.books: Dict[str, OrderBook] = {}
+        self.statuses: Dict[int, str] = {}
+        self.client_ids: Dict[str, int] = {}
+        self.ids = count(1)
+        self.lock: Lock = Lock()
+
+    def connect(self, key: str, secret: str) -> None:
+        pass
+
+    def start_listen(self):
+
+        if isinstance(self.market, SimulatedMarket):
+            self.market.attach(self)
+        super().start_listen()
+
+    def stop_listen(self):
+
+        if isinstance(self.market, SimulatedMarket):
+            self.market.detach(self)
+        super().stop_listen()
+
+    def submit(self, execution_order: SingleExecutionOrder) -> int:
+
+        params = execution_order.params
+        last_price = self.prices.price(params.symbol)
+
+        if params.quantity <= 0:
+            raise ConnectorException("Invalid quantity", execution_order)
+        if last_price is None:
+            raise ConnectorException("Unknown symbol", execution_order)
+
+        external_id = next(self.ids)
+        self.client_ids[execution_order.order_id] = external_id
+        if SimulatedConnector._marketable(params, last_price):
+            self.statuses[external_id] = SimulatedConnector.ORDER_STATUS_FILLED
+            self.emit(UserEvent(external_id, SimulatedConnector.ORDER_STATUS_FILLED))
+            return external_id
+
+        with self.lock:
+            self.statuses[external_id] = SimulatedConnector.ORDER_STATUS_NEW
+            self.books.setdefault(params.symbol, OrderBook()).add(external_id, params.command, params.price)
+        return external_id
+
+    def match(self, symbol: str, price: float) -> None:
+        """
+        Fills the resting orders the price reached. Called from the thread of the shared
+        market, so the fills never wait for a full queue: a stalled trader would freeze
+        the prices of every other one and deadlock a close waiting for that thread.
+        """
+
+        book = self.books.get(symbol)
+        if not book:
+            return
+
+        with self.lock:
+            filled = []
+            for external_id in book.match(price):
+                if self.statuses.get(external_id) == SimulatedConnector.ORDER_STATUS_NEW:
+                    self.statuses[external_id] = SimulatedConnector.ORDER_STATUS_FILLED
+                    filled.append(external_id)
+
+        for external_id in filled:
+            self.emit(UserEvent(external_id, SimulatedConnector.ORDER_STATUS_FILLED), block=False)
+
+    def is_filled(self, execution_order: SingleExecutionOrder) -> bool:
+        return self.statuses.get(execution_order.external_id) == SimulatedConnector.ORDER_STATUS_FILLED
+
+    def cancel(self, execution_order: SingleExecutionOrder) -> None:
+
+        with self.lock:
+            if not self.statuses.get(execution_order.external_id) == SimulatedConnector.ORDER_STATUS_NEW:
+                raise ConnectorException("Unknown order", execution_order)
+            self.statuses[execution_order.external_id] = SimulatedConnector.ORDER_STATUS_CANCELED
+
+        self.emit(UserEvent(execution_order.external_id, SimulatedConnector.ORDER_STATUS_CANCELED))
+
+    def find(self, execution_order: SingleExecutionOrder) -> Optional[Tuple[int, str]]:
+
+        with self.lock:
+            external_id = self.client_ids.get(execution_order.order_id)
+            if external_id is None:
+                return None
+            status = self.statuses[external_id]
+        if status == SimulatedConnector.ORDER_STATUS_NEW:
+            status = SimulatedConnector.ORDER_STATUS_OPEN
+        return external_id, status
+
+    def order_statuses(self, symbol: str, execution_orders: List[SingleExecutionOrder]) -> Dict[int, str]:
+
+        statuses = {}
+        with self.lock:
+            for execution_order in execution_orders:
+                status = self.statuses.get(execution_order.external_id)
+                if status == SimulatedConnector.ORDER_STATUS_FILLED or status == SimulatedConnector.ORDER_STATUS_CANCELED:
+                    statuses[execution_order.external_id] = status
+        return statuses
+
+    @staticmethod
+    def _marketable(params: ExecutionParams, last_price: float) -> bool:
+
+        if params.price == 0:
+            return True
+        if params.command == ExecutionParams.CMD_BUY:
+            return params.price >= last_price
+        return params.price <= last_price
@@ -1,104 +1,219 @@
 from __future__ import annotations
-from queue import Queue
-from typing import Dict, Any, Set, List, Callable, Type
+from cihatbot.logger import Logger
+from cihatbot.execution_order.execution_order import ExecutionOrder, OrderSnapshot
+from collections import deque
+from enum import Enum, auto
+from threading import Condition, Lock, get_ident
+from typing import Deque, Dict, List, Callable, Type, Iterable, Optional, FrozenSet, Union, NamedTuple, Tuple
+import logging
+import os
+
+
+LOGGER = Logger(__name__, logging.INFO)
+
+""" Set CIHATBOT_DEBUG in the environment to check the fields of every emitted event """
+DEBUG: bool = "CIHATBOT_DEBUG" in os.environ
+
+
+class QueuePolicy(Enum):
+    """ What EventQueue.put does with an event of a class when the queue is full """
+
+    BLOCK = auto()
+    DROP_OLDEST = auto()
+    COALESCE = auto()
 
 
 class Event:
-    name: str = "EVENT"
-    data_fields: Set[str] = {}
+    """
+    Events are slotted objects with one typed attribute per field, the fields of
+    each class being its __slots__. Fields are only checked when DEBUG is set,
+    on emit, since they are already guaranteed by the constructors.
+    """
 
-    def __init__(self, data: Dict[str, Any]):
-        for field in self.data_fields:
-            if field not in data:
-                raise DataException()
-        self.data: Dict[str, Any] = data
+    __slots__ = ()
+    name: str = "EVENT"
+    policy: QueuePolicy = QueuePolicy.BLOCK
+    optional_fields: FrozenSet[str] = frozenset()
 
     def __str__(self):
-        return f"""{self.name} - {self.data}"""
+        fields = {field: getattr(self, field) for field in self.__slots__}
+        return f"""{self.name} - {fields}"""
 
     def is_type(self, event_type: Type[Event]):
-        return self.name == event_type.name
+        return type(self) is event_type
+
+    def validate(self) -> None:
+        for field in self.__slots__:
+            if getattr(self, field, None) is None and field not in self.optional_fields:
+                raise DataException()
+
+    def merge(self, event: Event) -> Event:
+        """ Single event standing for self followed by event, for the classes with the COALESCE policy """
+        return event
 
 
 class ConnectEvent(Event):
+    __slots__ = ("user", "password")
     name = "CONNECT"
-    data_fields = {"user", "password"}
+
+    def __init__(self, user: str, password: str) -> None:
+        self.user: str = user
+        self.password: str = password
 
 
 class AddEvent(Event):
+    __slots__ = ("orders", "mode")
     name = "ADD"
-    data_fields = {"order", "mode"}
+
+    def __init__(self, orders: List[ExecutionOrder], mode: str) -> None:
+        self.orders: List[ExecutionOrder] = orders
+        self.mode: str = mode
 
 
 class DeleteEvent(Event):
+    __slots__ = ("order_id",)
     name = "DELETE"
-    data_fields = {"order_id"}
+
+    def __init__(self, order_id: str) -> None:
+        self.order_id: str = order_id
 
 
 class ConnectedEvent(Event):
+    __slots__ = ("user",)
     name = "CONNECTED"
-    data_fields = {"user"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, user: str) -> None:
+        self.user: str = user
 
 
 class AddedEvent(Event):
+    __slots__ = ("all", "orders")
     name = "ADDED"
-    data_fields = {"all", "single"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, all: OrderSnapshot, orders: Tuple[OrderSnapshot, ...]) -> None:
+        self.all: OrderSnapshot = all
+        self.orders: Tuple[OrderSnapshot, ...] = orders
 
 
 class DeletedEvent(Event):
+    __slots__ = ("all", "order_id")
     name = "DELETED"
-    data_fields = {"all", "order_id"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, all: OrderSnapshot, order_id: str) -> None:
+        self.all: OrderSnapshot = all
+        self.order_id: str = order_id
 
 
 class SubmittedEvent(Event):
+    __slots__ = ("all", "single")
     name = "SUBMITTED"
-    data_fields = {"all", "single"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, all: OrderSnapshot, single: OrderSnapshot) -> None:
+        self.all: OrderSnapshot = all
+        self.single: OrderSnapshot = single
 
 
 class FilledEvent(Event):
+    __slots__ = ("all", "single")
     name = "FILLED"
-    data_fields = {"all", "single"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, all: OrderSnapshot, single: OrderSnapshot) -> None:
+        self.all: OrderSnapshot = all
+        self.single: OrderSnapshot = single
 
 
 class CancelledEvent(Event):
+    __slots__ = ("all", "single")
     name = "CANCELLED"
-    data_fields = {"all", "single"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, all: OrderSnapshot, single: OrderSnapshot) -> None:
+        self.all: OrderSnapshot = all
+        self.single: OrderSnapshot = single
 
 
 class ErrorEvent(Event):
+    __slots__ = ("order", "message")
     name = "ERROR"
-    data_fields = {"order", "message"}
+    policy = QueuePolicy.DROP_OLDEST
+
+    def __init__(self, order: OrderSnapshot, message: str) -> None:
+        self.order: OrderSnapshot = order
+        self.message: str = message
 
 
 class UserEvent(Event):
+    __slots__ = ("external_id", "status")
     name = "USER"
-    data_fields = {"external_id", "status"}
+
+    def __init__(self, external_id: int, status: str) -> None:
+        self.external_id: int = external_id
+        self.status: str = status
 
 
 class TickerEvent(Event):
+    __slots__ = ("symbols",)
     name = "TICKER"
+    policy = QueuePolicy.COALESCE
+
+    def __init__(self, symbols: List[str]) -> None:
+        self.symbols: List[str] = symbols
+
+    def merge(self, event: TickerEvent) -> Event:
+        symbols = dict.fromkeys(self.symbols)
+        symbols.update(dict.fromkeys(event.symbols))
+        return TickerEvent(list(symbols))
 
 
 class TimerEvent(Event):
+    __slots__ = ()
     name = "TIMER"
+    policy = QueuePolicy.COALESCE
 
 
 class AddTraderEvent(Event):
+    __slots__ = ("trader_name", "connector_name", "config")
     name = "ADD_TRADER"
-    data_fields = {"trader_name", "connector_name", "config"}
+    optional_fields = frozenset({"config"})
+
+    def __init__(self, trader_name: str, connector_name: str, config: Dict = None) -> None:
+        self.trader_name: str = trader_name
+        self.connector_name: str = connector_name
+        self.config: Optional[Dict] = config
 
 
 class AddUiEvent(Event):
+    __slots__ = ("ui_name", "parser_name", "config")
     name = "ADD_UI"
-    data_fields = {"ui_name", "parser_name", "config"}
+    optional_fields = frozenset({"config"})
+
+    def __init__(self, ui_name: str, parser_name: str, config: Dict = None) -> None:
+        self.ui_name: str = ui_name
+        self.parser_name: str = parser_name
+        self.config: Optional[Dict] = config
 
 
 class AddUserEvent(Event):
+    __slots__ = ("ui", "parser", "trader", "connector", "ui_config", "trader_config")
     name = "NEW_USER"
-    data_fields = {"ui", "parser", "trader", "connector"}
+    optional_fields = frozenset({"ui_config", "trader_config"})
+
+    def __init__(self, ui: str, parser: str, trader: str, connector: str, ui_config: Dict = None, trader_config: Dict = None) -> None:
+        self.ui: str = ui
+        self.parser: str = parser
+        self.trader: str = trader
+        self.connector: str = connector
+        self.ui_config: Optional[Dict] = ui_config
+        self.trader_config: Optional[Dict] = trader_config
 
 
 class StopEvent(Event):
+    __slots__ = ()
     name = "STOP"
 
 
@@ -106,30 +221,172 @@ class DataException(Exception):
     pass
 
 
+class QueueMetrics(NamedTuple):
+    depth: int
+    high_water: int
+    dropped: int
+    coalesced: int
+    blocked: int
+
+
+class EventQueue:
+    """
+    FIFO of events bounded by capacity, 0 meaning unbounded. Each event class has a
+    QueuePolicy: BLOCK events wait for room, DROP_OLDEST events evict the oldest
+    droppable event (or are dropped themselves if there is none), and COALESCE
+    events are merged into the one of the same class still waiting, if any,
+    instead of being queued after it. A consumer that stalls finds at most one
+    tick per class when it comes back, and a stuck one holds a bounded amount of
+    memory while its drops show in metrics() and in the log.
+
+    A BLOCK event put by the consumer thread itself, as when a trader's connector
+    reports a fill from inside submit, exceeds capacity instead of waiting: the
+    thread that would make room is the one waiting.
+    """
+
+    def __init__(self, capacity: int = 0, policies: Dict[Type[Event], QueuePolicy] = None, name: str = "") -> None:
+        self.events: Deque[Union[Event, List[Event]]] = deque()
+        self.pending: Dict[Type[Event], List[Event]] = {}
+        self.capacity: int = capacity
+        self.policies: Dict[Type[Event], QueuePolicy] = policies or {}
+        self.name: str = name
+        self.lock: Lock = Lock()
+        self.not_empty: Condition = Condition(self.lock)
+        self.not_full: Condition = Condition(self.lock)
+        self.high_water: int = 0
+        self.dropped: int = 0
+        self.coalesced: int = 0
+        self.blocked: int = 0
+        self.consumer: Optional[int] = None
+
+    def put(self, event: Event, block: bool = True) -> None:
+        """ Queues event according to the policy of its class, block=False lets a BLOCK event exceed capacity """
+
+        event_type = type(event)
+        policy = self.policies.get(event_type, event.policy)
+
+        with self.lock:
+            if policy == QueuePolicy.COALESCE:
+                slot = self.pending.get(event_type)
+                if slot is not None:
+                    slot[0] = slot[0].merge(event)
+                    self.coalesced += 1
+                    return
+
+            if self._is_full():
+                if policy == QueuePolicy.BLOCK and block and not get_ident() == self.consumer:
+                    self.blocked += 1
+                    while self._is_full():
+                        self.not_full.wait()
+                elif not policy == QueuePolicy.BLOCK and not self._evict():
+                    self._drop(event)
+                    return
+
+            if policy == QueuePolicy.COALESCE:
+                slot = [event]
+                self.pending[event_type] = slot
+                self.events.append(slot)
+            else:
+                self.events.append(event)
+
+            if len(self.events) > self.high_water:
+                self.high_water = len(self.events)
+            self.not_empty.notify()
+
+    def get(self) -> Event:
+
+        with self.lock:
+            self.consumer = get_ident()
+            while not self.events:
+                self.not_empty.wait()
+            event = self.events.popleft()
+            if isinstance(event, list):
+                event = event[0]
+                del self.pending[type(event)]
+            self.not_full.notify()
+            return event
+
+    def qsize(self) -> int:
+        return len(self.events)
+
+    def empty(self) -> bool:
+        return not self.events
+
+    def metrics(self) -> QueueMetrics:
+        return QueueMetrics(len(self.events), self.high_water, self.dropped, self.coalesced, self.blocked)
+
+    def _is_full(self) -> bool:
+        return bool(self.capacity) and len(self.events) >= self.capacity
+
+    def _evict(self) -> bool:
+        """ Drops the oldest queued event whose class does not block, returns False if there is none """
+
+        for position, queued in enumerate(self.events):
+            event = queued[0] if isinstance(queued, list) else queued
+            if not self.policies.get(type(event), event.policy) == QueuePolicy.BLOCK:
+                del self.events[position]
+                if isinstance(queued, list):
+                    del self.pending[type(event)]
+                self._drop(event)
+                return True
+        return False
+
+    def _drop(self, event: Event) -> None:
+        self.dropped += 1
+        if self.dropped & (self.dropped - 1) == 0:
+            LOGGER.log(logging.WARNING, f"""Queue {self.name} full at {self.capacity} events, {self.dropped} dropped so far, last {event.name}""")
+
+
 class EventListener:
+    """ Receives only the events of event_types from the emitters it is added to, all of them if None """
 
-    def __init__(self):
-        self.queue: Queue = Queue()
+    def __init__(self, event_types: Iterable[Type[Event]] = None, capacity: int = 0, name: str = ""):
+        self.queue: EventQueue = EventQueue(capacity, name=name)
+        self.event_types: Optional[FrozenSet[Type[Event]]] = None if event_types is None else frozenset(event_types)
+
+    def accepts(self, event_type: Type[Event]) -> bool:
+        return self.event_types is None or event_type in self.event_types
 
     def listen(self, on_event: Callable[[Event], None]):
         stop = False
         while not stop:
             event = self.queue.get()
             on_event(event)
-            stop = event.is_type(StopEvent)
+            stop = type(event) is StopEvent
 
     def stop(self):
-        self.queue.put(StopEvent({}))
+        self.queue.put(StopEvent(), block=False)
 
 
 class EventEmitter:
+    """
+    Delivers each event only to the listeners subscribed to its class. The queues of
+    each class are resolved on its first emit and cached, listeners are added and
+    removed by replacing the lists, so emit never needs a lock.
+    """
 
     def __init__(self):
-        self.listeners: List[Queue] = []
+        self.listeners: List[EventListener] = []
+        self.routes: Dict[Type[Event], List[EventQueue]] = {}
 
     def add_listener(self, listener: EventListener):
-        self.listeners.append(listener.queue)
-
-    def emit(self, event: Event):
-        for listener in self.listeners:
-            listener.put(event)
+        self.listeners = self.listeners + [listener]
+        self.routes = {}
+
+    def remove_listener(self, listener: EventListener):
+        self.listeners = [added for added in self.listeners if added.queue is not listener.queue]
+        self.routes = {}
+
+    def emit(self, event: Event, block: bool = True):
+        """ Puts event on the queues subscribed to its class, block=False never waits for a full one """
+
+        if DEBUG:
+            event.validate()
+        routes = self.routes
+        event_type = type(event)
+        queues = routes.get(event_type)
+        if queues is None:
+            queues = [listener.queue for listener in self.listeners if listener.accepts(event_type)]
+            routes[event_type] = queues
+        for queue in queues:
+            queue.put(event, block)
@@ -0,0 +1,81 @@
+from cihatbot.execution_order.execution_order import (
+    ExecutionOrder,
+    EmptyExecutionOrder,
+    SingleExecutionOrder,
+    MultipleExecutionOrder,
+    ParallelExecutionOrder,
+    SequentExecutionOrder,
+    ExecutionParams,
+    ExecutionConditions,
+    OrderStatus,
+    OrderSnapshot)
+from typing import Dict, List, Type, Union
+
+
+class OrderCodec:
+    """
+    Compact JSON-compatible form of an ExecutionOrder tree, keeping ids and statuses:
+    single = ["single", ORDER_ID, EXTERNAL_ID, STATUS, FROM_TIME, COMMAND, SYMBOL, PRICE, QUANTITY, PRICE_BELOW, PRICE_ABOVE]
+    multiple = ["parallel"|"sequent", ORDER_ID, [ORDER, ...]]
+    empty = ["empty", ORDER_ID]
+
+    Live orders and their snapshots share attribute names, so both can be encoded.
+    """
+
+    MULTIPLE_TYPES: Dict[str, Type[MultipleExecutionOrder]] = {
+        "parallel": ParallelExecutionOrder,
+        "sequent": SequentExecutionOrder
+    }
+    STATUSES: Dict[str, OrderStatus] = {status.name: status for status in OrderStatus}
+    RESET_STATUSES = frozenset([OrderStatus.PENDING.name, OrderStatus.WAITING.name])
+    NO_CONDITIONS: ExecutionConditions = ExecutionConditions()
+
+    @staticmethod
+    def encode(order: Union[ExecutionOrder, OrderSnapshot]) -> List:
+
+        if order.order_type == "single":
+            params = order.params
+            conditions = order.conditions
+            return [
+                order.order_type, order.order_id, order.external_id, order.status.name, order.from_time,
+                params.command, params.symbol, params.price, params.quantity,
+                conditions.price_below, conditions.price_above
+            ]
+
+        elif order.order_type in OrderCodec.MULTIPLE_TYPES:
+            return [order.order_type, order.order_id, [OrderCodec.encode(child) for child in order.orders]]
+
+        return [order.order_type, order.order_id]
+
+    @staticmethod
+    def decode(data: List) -> ExecutionOrder:
+        """ Rebuilds a detached tree, orders left WAITING come back PENDING since triggers are not persisted """
+
+        order_type = data[0]
+
+        if order_type == "single":
+            _, order_id, external_id, status, from_time, command, symbol, price, quantity, price_below, price_above = data
+            order = SingleExecutionOrder(
+                from_time,
+                ExecutionParams(command, symbol, price, quantity),
+                OrderCodec._conditions(price_below, price_above),
+                order_id
+            )
+            order.external_id = external_id
+            if status not in OrderCodec.RESET_STATUSES:
+                order.status = OrderCodec.STATUSES[status]
+            return order
+
+        elif order_type in OrderCodec.MULTIPLE_TYPES:
+            return OrderCodec.MULTIPLE_TYPES[order_type]([OrderCodec.decode(child) for child in data[2]], data[1])
+
+        order = EmptyExecutionOrder()
+        order.order_id = data[1]
+        return order
+
+    @staticmethod
+    def _conditions(price_below: float, price_above: float) -> ExecutionConditions:
+        """ Conditions are never mutated, so the orders without any share a single instance """
+        if not price_below and not price_above:
+            return OrderCodec.NO_CONDITIONS
+        return ExecutionConditions(price_below, price_above)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from cihatbot.execution_order.execution_order import SingleExecutionOrder
+from typing import List, Tuple
+from itertools import count
+import heapq
+
+
+class DeadlineIndex:
+    """
+    Orders parked until a deadline, such as a from_time still in the future or the
+    end of a rate limit window, kept in a min-heap so that they are not scanned on
+    every event. A timer wake-up pops the k due orders in O(k log n) without
+    looking at the others.
+    """
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[float, int, SingleExecutionOrder]] = []
+        self.sequence = count()
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def add(self, order: SingleExecutionOrder, deadline: float = None) -> None:
+        """ Parks order until deadline, its from_time by default """
+        heapq.heappush(self.heap, (order.from_time if deadline is None else deadline, next(self.sequence), order))
+
+    def pop(self, now: float) -> List[SingleExecutionOrder]:
+        """ Removes and returns the orders due at now """
+
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due.append(heapq.heappop(self.heap)[2])
+        return due
@@ -1,59 +1,209 @@
 from __future__ import annotations
-from threading import Lock
-from typing import List, Callable
+from typing import List, Dict, Tuple, Callable, Iterator, Optional, NamedTuple, Union
+from cihatbot.execution_order.persistent_vector import PersistentVector
 from uuid import uuid4, UUID
 from enum import Enum, auto
 
 
-def locked(no_lock: Callable):
-
-    def with_lock(self: ExecutionOrder, *args, **kwargs):
-        if self.lock.acquire():
-            return_value = no_lock(self, *args, **kwargs)
-            self.lock.release()
-            return return_value
-
-    return with_lock
-
-
 class ExecutionOrder:
-
-    def __init__(self, order_type: str):
+    """
+    Public operations are meant to be called on the root of a tree, they use the
+    root's OrderIndex to find nodes instead of walking the whole tree.
+
+    A tree is owned by a single thread (the trader), which is the only one allowed
+    to read or mutate it. Other threads get read-only copies through snapshot().
+
+    Every node caches its snapshot. A mutation drops the cache of the node and of
+    its ancestors only, so the next snapshot rebuilds one path and shares all the
+    unchanged subtrees with the previous version. A node without a cache never
+    has an ancestor with one, which lets invalidation stop at the first of them.
+    Groups keep the snapshots of their children in a PersistentVector, at the
+    slot of each child, and record which slots changed since their last snapshot,
+    so that a new version of a wide group copies O(log n) references, not n.
+    """
+
+    def __init__(self, order_type: str, order_id: str = None):
         self.order_type: str = order_type
         self.status: OrderStatus = OrderStatus.PENDING
-        self.order_id: str = uuid4().hex
+        self.order_id: str = order_id or uuid4().hex
         self.external_id: int = 0
-        self.lock: Lock = Lock()
+        self.parent: Optional[MultipleExecutionOrder] = None
+        self.prev_sibling: Optional[ExecutionOrder] = None
+        self.next_sibling: Optional[ExecutionOrder] = None
+        self.slot: int = 0
+        self.index: Optional[OrderIndex] = None
+        self.cached_snapshot: Optional[OrderSnapshot] = None
 
     def __str__(self):
         return f"""{self.order_type} order"""
 
-    @locked
     def add_parallel(self, execution_order: ExecutionOrder) -> ExecutionOrder:
         return execution_order
 
-    @locked
     def add_sequential(self, execution_order: ExecutionOrder) -> ExecutionOrder:
         return execution_order
 
-    @locked
+    def add_parallel_all(self, execution_orders: List[ExecutionOrder]) -> ExecutionOrder:
+        """ Adds all the orders in parallel with a single splice, or a single wrap of the root """
+        if len(execution_orders) == 1:
+            return self.add_parallel(execution_orders[0])
+        return self.add_parallel(ParallelExecutionOrder(execution_orders))
+
+    def add_sequential_all(self, execution_orders: List[ExecutionOrder]) -> ExecutionOrder:
+        """ Adds all the orders one after the other with a single splice, or a single wrap of the root """
+        if len(execution_orders) == 1:
+            return self.add_sequential(execution_orders[0])
+        return self.add_sequential(SequentExecutionOrder(execution_orders))
+
     def remove(self, order_id: str = None, external_id: int = None) -> ExecutionOrder:
-        return EmptyExecutionOrder()
+        order = self._find(order_id=order_id, external_id=external_id)
+        if order is None:
+            return self
+        return self._remove(order)
 
-    @locked
     def call(self, func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> bool:
-        pass
-
-    @locked
-    def submit(self, submit_func: Callable[[SingleExecutionOrder], OrderStatus]) -> None:
-        pass
+        order = self._find(order_id=order_id, external_id=external_id)
+        if order is None:
+            return False
+        for single in list(order.singles()):
+            func(single)
+        return True
+
+    def submit(self, submit_func: Callable[[List[SingleExecutionOrder]], List[OrderStatus]]) -> List[SingleExecutionOrder]:
+        """ Passes all the ready leaves at once to submit_func, returns the ones that got submitted """
+
+        index = self._get_index()
+        orders = list(index.ready.values())
+        if not orders:
+            return []
+
+        submitted = []
+        for order, status in zip(orders, submit_func(orders)):
+            if status == OrderStatus.PENDING:
+                continue
+            order.status = status
+            order._invalidate()
+            del index.ready[order.order_id]
+            index.add_external(order)
+            if order.status == OrderStatus.SUBMITTED:
+                submitted.append(order)
+        return submitted
+
+    def update(self, order_id: str, status: OrderStatus, external_id: int) -> None:
+        """ Applies the outcome of a submission made outside of submit, as when replaying a journal """
+
+        index = self._get_index()
+        order = index.orders.get(order_id)
+        if order is None:
+            return
+        order.status = status
+        order.external_id = external_id
+        order._invalidate()
+        if not status == OrderStatus.PENDING:
+            index.ready.pop(order_id, None)
+            index.add_external(order)
+        elif order._is_active():
+            index.ready[order_id] = order
+
+    def wake(self, order: SingleExecutionOrder) -> None:
+        """ Puts back among the ready leaves an order that was left WAITING by submit """
+
+        index = self._get_index()
+        if order.status == OrderStatus.WAITING and order.order_id in index.orders:
+            order.status = OrderStatus.PENDING
+            order._invalidate()
+            index.ready[order.order_id] = order
 
-    @locked
     def cancel(self, cancel_func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> ExecutionOrder:
-        return self.remove()
+        order = self._find(order_id=order_id, external_id=external_id)
+        if order is None:
+            return self
+
+        root = self
+        for single in list(order.singles()):
+            if single.status == OrderStatus.SUBMITTED:
+                cancel_func(single)
+            else:
+                root = root._remove(single)
+        return root
+
+    def snapshot(self) -> OrderSnapshot:
+        return EmptyOrderSnapshot(self.order_type, self.order_id)
+
+    def walk(self) -> Iterator[ExecutionOrder]:
+        yield self
+
+    def singles(self) -> Iterator[SingleExecutionOrder]:
+        return iter(())
+
+    def _ready_leaves(self) -> Iterator[SingleExecutionOrder]:
+        """ Pending leaves that can be submitted once this order is reached """
+        return iter(())
+
+    def _invalidate(self) -> None:
+        order = self
+        while order is not None and order.cached_snapshot is not None:
+            order.cached_snapshot = None
+            if order.parent is not None:
+                order.parent._changed(order.slot, order)
+            order = order.parent
+
+    def _is_active(self) -> bool:
+        """ Whether every ancestor lets this order be submitted now """
+        order = self
+        while order.parent is not None:
+            if not order.parent._activates(order):
+                return False
+            order = order.parent
+        return True
+
+    def _get_index(self) -> OrderIndex:
+        if self.index is None:
+            self.index = OrderIndex()
+            self.index.add(self)
+            self.index.add_ready(self)
+        return self.index
+
+    def _find(self, order_id: str = None, external_id: int = None) -> Optional[ExecutionOrder]:
+        if not order_id and not external_id:
+            return self
+        return self._get_index().find(order_id=order_id, external_id=external_id)
+
+    def _remove(self, order: ExecutionOrder) -> ExecutionOrder:
+        """ Detaches order from the tree, dropping the groups it leaves empty """
+
+        if order is self:
+            return EmptyExecutionOrder()
+
+        index = self._get_index()
+        index.discard(order)
+
+        parent = order.parent
+        parent._invalidate()
+        while parent is not None:
+            was_first = parent.orders.first is order
+            parent._detach(order)
+            if parent.orders:
+                if was_first and isinstance(parent, SequentExecutionOrder) and parent._is_active():
+                    index.add_ready(parent.orders.first)
+                return self
+            index.discard(parent)
+            order, parent = parent, parent.parent
+
+        return EmptyExecutionOrder()
+
+    def _wrap(self, wrapper: MultipleExecutionOrder, execution_order: ExecutionOrder) -> MultipleExecutionOrder:
+        """ Moves the index of this root to wrapper, the new root containing self and execution_order """
 
-    def _is_order(self, order_id: str = None,  external_id: int = None):
-        return self.order_id == order_id or self.external_id == external_id or (not order_id and not external_id)
+        if self.index is not None:
+            wrapper.index = self.index
+            wrapper.index.add_node(wrapper)
+            wrapper.index.add(execution_order)
+            if execution_order._is_active():
+                wrapper.index.add_ready(execution_order)
+            self.index = None
+        execution_order.index = None
+        return wrapper
 
 
 class EmptyExecutionOrder(ExecutionOrder):
@@ -61,185 +211,328 @@ class EmptyExecutionOrder(ExecutionOrder):
     def __init__(self):
         super().__init__("empty")
 
+    def remove(self, order_id: str = None, external_id: int = None) -> ExecutionOrder:
+        return self
+
+    def call(self, func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> bool:
+        return False
+
+    def submit(self, submit_func: Callable[[List[SingleExecutionOrder]], List[OrderStatus]]) -> List[SingleExecutionOrder]:
+        return []
+
+    def update(self, order_id: str, status: OrderStatus, external_id: int) -> None:
+        pass
+
+    def wake(self, order: SingleExecutionOrder) -> None:
+        pass
+
+    def cancel(self, cancel_func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> ExecutionOrder:
+        return self
+
 
 class SingleExecutionOrder(ExecutionOrder):
 
-    def __init__(self, from_time: float, execution_params: ExecutionParams, execution_conditions: ExecutionConditions):
-        super().__init__("single")
+    def __init__(self, from_time: float, execution_params: ExecutionParams, execution_conditions: ExecutionConditions, order_id: str = None):
+        super().__init__("single", order_id)
 
         self.from_time: float = from_time
         self.params: ExecutionParams = execution_params
         self.conditions: ExecutionConditions = execution_conditions
 
     def __str__(self):
+        if self.conditions.has_price():
+            return f"""{self.params.command} {self.params.symbol} {self.params.price} {self.params.quantity} when {self.conditions}"""
         return f"""{self.params.command} {self.params.symbol} {self.params.price} {self.params.quantity}"""
 
-    @locked
     def add_parallel(self, execution_order: ExecutionOrder) -> ExecutionOrder:
-        return ParallelExecutionOrder([self, execution_order])
+        return self._wrap(ParallelExecutionOrder([self, execution_order]), execution_order)
 
-    @locked
     def add_sequential(self, execution_order: ExecutionOrder) -> ExecutionOrder:
-        return SequentExecutionOrder([self, execution_order])
+        return self._wrap(SequentExecutionOrder([self, execution_order]), execution_order)
 
-    @locked
-    def remove(self, order_id: str = None,  external_id: int = None) -> ExecutionOrder:
+    def snapshot(self) -> OrderSnapshot:
+        if self.cached_snapshot is None:
+            self.cached_snapshot = SingleOrderSnapshot(self.order_type, self.order_id, self.external_id, self.status, self.from_time, self.params, self.conditions)
+        return self.cached_snapshot
 
-        if self._is_order(order_id=order_id, external_id=external_id):
-            return EmptyExecutionOrder()
-        else:
-            return self
-
-    @locked
-    def call(self, func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> bool:
-
-        if self._is_order(order_id=order_id, external_id=external_id):
-            func(self)
-            return True
-        else:
-            return False
-
-    @locked
-    def submit(self, submit_func: Callable[[SingleExecutionOrder], OrderStatus]) -> None:
+    def singles(self) -> Iterator[SingleExecutionOrder]:
+        yield self
 
+    def _ready_leaves(self) -> Iterator[SingleExecutionOrder]:
         if self.status == OrderStatus.PENDING:
-            self.status = submit_func(self)
-
-    @locked
-    def cancel(self, cancel_func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> ExecutionOrder:
-
-        if not self._is_order(order_id=order_id, external_id=external_id):
-            return self
-        elif self.status == OrderStatus.SUBMITTED:
-            cancel_func(self)
-            return self
-        else:
-            return self.remove()
+            yield self
 
 
 class MultipleExecutionOrder(ExecutionOrder):
 
-    def __init__(self, order_type, orders: List[ExecutionOrder]):
-        super().__init__(order_type)
+    def __init__(self, order_type, orders: List[ExecutionOrder], order_id: str = None):
+        super().__init__(order_type, order_id)
 
         if len(orders) == 0:
             raise EmptyOrderList
 
-        self.orders = orders
+        self.orders: OrderList = OrderList(orders)
+        for order in orders:
+            order.parent = self
+
+        self.slots: Optional[PersistentVector] = None
+        self.changes: Dict[int, Optional[ExecutionOrder]] = {}
+        self.next_slot: int = 0
+        self.holes: int = 0
 
     def __str__(self):
         orders = [str(order) for order in self.orders]
         return f"""[{self.order_type} {', '.join(orders)}]"""
 
-    @locked
-    def remove(self, order_id: str = None,  external_id: int = None) -> ExecutionOrder:
-
-        if self._is_order(order_id=order_id, external_id=external_id):
-            return EmptyExecutionOrder()
-
-        new_orders = []
-        empty = True
-        for order in self.orders:
-            new_order = order.remove(order_id, external_id)
-            if not isinstance(new_order, EmptyExecutionOrder):
-                new_orders.append(new_order)
-                empty = False
-
-        if empty:
-            return EmptyExecutionOrder()
-        else:
-            self.orders = new_orders
-            return self
-
-    @locked
-    def call(self, func: Callable[[SingleExecutionOrder], None], order_id: str = None,  external_id: int = None) -> bool:
-        applied = False
+    def snapshot(self) -> OrderSnapshot:
+        if self.cached_snapshot is None:
+            if self.slots is None:
+                self._build_slots()
+            else:
+                slots = self.slots
+                for slot, order in self.changes.items():
+                    slots = slots.set(slot, None if order is None else order.snapshot())
+                self.slots = slots
+                self.changes = {}
+            self.cached_snapshot = MultipleOrderSnapshot(self.order_type, self.order_id, self.slots)
+        return self.cached_snapshot
+
+    def walk(self) -> Iterator[ExecutionOrder]:
+        """ Pre-order walk with an explicit stack, instead of one nested generator per node """
+
+        stack: List[ExecutionOrder] = [self]
+        while stack:
+            order = stack.pop()
+            yield order
+            if isinstance(order, MultipleExecutionOrder):
+                stack.extend(reversed(list(order.orders)))
+
+    def singles(self) -> Iterator[SingleExecutionOrder]:
         for order in self.orders:
-            applied = order.call(func, order_id=order_id, external_id=external_id) or applied
-        return applied
-
-    @locked
-    def cancel(self, cancel_func: Callable[[SingleExecutionOrder], None], order_id: str = None, external_id: int = None) -> ExecutionOrder:
-
-        if self._is_order(order_id=order_id, external_id=external_id):
-            self.cancel(cancel_func)
-            return self.remove()
-
-        new_orders = []
-        empty = True
-        for order in self.orders:
-            new_order = order.cancel(cancel_func, order_id=order_id, external_id=external_id)
-            if not isinstance(new_order, EmptyExecutionOrder):
-                new_orders.append(new_order)
-                empty = False
-
-        if empty:
-            return EmptyExecutionOrder()
-        else:
-            self.orders = new_orders
-            return self
-
-    def _check_submitted(self):
-        for order in self.orders:
-            if not order.status == OrderStatus.SUBMITTED:
-                return
-        self.status = OrderStatus.SUBMITTED
+            yield from order.singles()
+
+    def _activates(self, order: ExecutionOrder) -> bool:
+        return True
+
+    def _changed(self, slot: int, order: Optional[ExecutionOrder]) -> None:
+        """ Records that the child at slot lost its snapshot, or was removed if order is None """
+        if self.slots is not None:
+            self.changes[slot] = order
+
+    def _build_slots(self) -> None:
+        """ Gives the children consecutive slots again, dropping the holes left by removals, in O(n) """
+
+        snapshots = []
+        for slot, order in enumerate(self.orders):
+            order.slot = slot
+            snapshots.append(order.cached_snapshot or order.snapshot())
+        self.slots = PersistentVector.of(snapshots)
+        self.changes = {}
+        self.next_slot = len(snapshots)
+        self.holes = 0
+
+    def _detach(self, order: ExecutionOrder) -> None:
+        """ Removes a child in O(1), the slots are rebuilt once holes outnumber the children """
+
+        self.orders.remove(order)
+        order.parent = None
+        self._changed(order.slot, None)
+        self.holes += 1
+        if self.holes > len(self.orders) + PersistentVector.BRANCHING:
+            self.slots = None
+
+    def _extend(self, orders: List[ExecutionOrder]) -> None:
+        self._invalidate()
+        self.orders.extend(orders)
+        for order in orders:
+            order.parent = self
+            order.index = None
+            order.slot = self.next_slot
+            self.next_slot += 1
+            self._changed(order.slot, order)
+        if self.index is not None:
+            for order in orders:
+                self.index.add(order)
+                if self._activates(order):
+                    self.index.add_ready(order)
 
 
 class ParallelExecutionOrder(MultipleExecutionOrder):
 
-    def __init__(self, orders: List[ExecutionOrder]):
-        super().__init__("parallel", orders)
+    def __init__(self, orders: List[ExecutionOrder], order_id: str = None):
+        super().__init__("parallel", orders, order_id)
 
-    @locked
     def add_parallel(self, execution_order: ExecutionOrder) -> ExecutionOrder:
         if isinstance(execution_order, ParallelExecutionOrder):
-            self.orders.extend(execution_order.orders)
+            self._extend(list(execution_order.orders))
         else:
-            self.orders.append(execution_order)
-        self.status = OrderStatus.PENDING
+            self._extend([execution_order])
         return self
 
-    @locked
     def add_sequential(self, execution_order: ExecutionOrder) -> ExecutionOrder:
-        return SequentExecutionOrder([self, execution_order])
+        return self._wrap(SequentExecutionOrder([self, execution_order]), execution_order)
 
-    @locked
-    def submit(self, submit_func: Callable[[SingleExecutionOrder], OrderStatus]):
-        if not self.status == OrderStatus.SUBMITTED:
-            for order in self.orders:
-                order.submit(submit_func)
-        self._check_submitted()
+    def _ready_leaves(self) -> Iterator[SingleExecutionOrder]:
+        for order in self.orders:
+            yield from order._ready_leaves()
 
 
 class SequentExecutionOrder(MultipleExecutionOrder):
 
-    def __init__(self, orders: List[ExecutionOrder]):
-        super().__init__("sequent", orders)
+    def __init__(self, orders: List[ExecutionOrder], order_id: str = None):
+        super().__init__("sequent", orders, order_id)
 
-    @locked
     def add_parallel(self, execution_order: ExecutionOrder) -> ExecutionOrder:
-        return ParallelExecutionOrder([self, execution_order])
+        return self._wrap(ParallelExecutionOrder([self, execution_order]), execution_order)
 
-    @locked
     def add_sequential(self, execution_order: ExecutionOrder) -> ExecutionOrder:
         if isinstance(execution_order, SequentExecutionOrder):
-            self.orders.extend(execution_order.orders)
+            self._extend(list(execution_order.orders))
         else:
-            self.orders.append(execution_order)
-        self.status = OrderStatus.PENDING
+            self._extend([execution_order])
         return self
 
-    @locked
-    def submit(self, submit_func: Callable[[SingleExecutionOrder], OrderStatus]):
-        if not self.status == OrderStatus.SUBMITTED:
-            self.orders[0].submit(submit_func)
-        self._check_submitted()
+    def _ready_leaves(self) -> Iterator[SingleExecutionOrder]:
+        yield from self.orders.first._ready_leaves()
+
+    def _activates(self, order: ExecutionOrder) -> bool:
+        return self.orders.first is order
+
+
+class OrderList:
+    """
+    Children of a MultipleExecutionOrder, linked through their prev_sibling and
+    next_sibling, so that the first one is found and any one is detached in O(1)
+    whatever the width of the group
+    """
+
+    def __init__(self, orders: List[ExecutionOrder]) -> None:
+        self.first: Optional[ExecutionOrder] = None
+        self.last: Optional[ExecutionOrder] = None
+        self.size: int = 0
+        self.extend(orders)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[ExecutionOrder]:
+        order = self.first
+        while order is not None:
+            following = order.next_sibling
+            yield order
+            order = following
+
+    def append(self, order: ExecutionOrder) -> None:
+        order.prev_sibling = self.last
+        order.next_sibling = None
+        if self.last is None:
+            self.first = order
+        else:
+            self.last.next_sibling = order
+        self.last = order
+        self.size += 1
+
+    def extend(self, orders: List[ExecutionOrder]) -> None:
+        for order in orders:
+            self.append(order)
+
+    def remove(self, order: ExecutionOrder) -> None:
+        if order.prev_sibling is None:
+            self.first = order.next_sibling
+        else:
+            order.prev_sibling.next_sibling = order.next_sibling
+        if order.next_sibling is None:
+            self.last = order.prev_sibling
+        else:
+            order.next_sibling.prev_sibling = order.prev_sibling
+        order.prev_sibling = None
+        order.next_sibling = None
+        self.size -= 1
+
+
+class OrderIndex:
+    """ Maps order_id and external_id to the nodes of a tree, and keeps the leaves ready to be submitted """
+
+    def __init__(self) -> None:
+        self.orders: Dict[str, ExecutionOrder] = {}
+        self.external: Dict[int, ExecutionOrder] = {}
+        self.ready: Dict[str, SingleExecutionOrder] = {}
+
+    def add(self, execution_order: ExecutionOrder) -> None:
+        orders = self.orders
+        external = self.external
+        for order in execution_order.walk():
+            orders[order.order_id] = order
+            if order.external_id:
+                external[order.external_id] = order
+
+    def add_node(self, order: ExecutionOrder) -> None:
+        self.orders[order.order_id] = order
+        self.add_external(order)
+
+    def add_external(self, order: ExecutionOrder) -> None:
+        if order.external_id:
+            self.external[order.external_id] = order
+
+    def add_ready(self, execution_order: ExecutionOrder) -> None:
+        for order in execution_order._ready_leaves():
+            self.ready[order.order_id] = order
+
+    def discard(self, execution_order: ExecutionOrder) -> None:
+        for order in execution_order.walk():
+            self.orders.pop(order.order_id, None)
+            self.external.pop(order.external_id, None)
+            self.ready.pop(order.order_id, None)
+
+    def find(self, order_id: str = None, external_id: int = None) -> Optional[ExecutionOrder]:
+        if order_id in self.orders:
+            return self.orders[order_id]
+        return self.external.get(external_id)
+
+
+class EmptyOrderSnapshot(NamedTuple):
+    order_type: str
+    order_id: str
+
+    def __str__(self):
+        return f"""{self.order_type} order"""
+
+
+class SingleOrderSnapshot(NamedTuple):
+    order_type: str
+    order_id: str
+    external_id: int
+    status: OrderStatus
+    from_time: float
+    params: ExecutionParams
+    conditions: ExecutionConditions
+
+    def __str__(self):
+        if self.conditions.has_price():
+            return f"""{self.params.command} {self.params.symbol} {self.params.price} {self.params.quantity} when {self.conditions}"""
+        return f"""{self.params.command} {self.params.symbol} {self.params.price} {self.params.quantity}"""
+
+
+class MultipleOrderSnapshot(NamedTuple):
+    order_type: str
+    order_id: str
+    orders: PersistentVector
+
+    def __str__(self):
+        orders = [str(order) for order in self.orders]
+        return f"""[{self.order_type} {', '.join(orders)}]"""
+
+
+""" Immutable copy of an ExecutionOrder tree, safe to hand to other threads """
+OrderSnapshot = Union[EmptyOrderSnapshot, SingleOrderSnapshot, MultipleOrderSnapshot]
 
 
 class OrderStatus(Enum):
+    """ SUBMITTING marks an order whose submission was journaled but whose outcome was lost in a crash """
 
     PENDING = auto()
+    WAITING = auto()
+    SUBMITTING = auto()
     SUBMITTED = auto()
     REJECTED = auto()
 
@@ -261,7 +554,35 @@ class ExecutionParams:
 
 
 class ExecutionConditions:
-    pass
+    """ Price bounds an order waits for: price <= price_below and price >= price_above, 0 meaning unbounded """
+
+    def __init__(self, price_below: float = 0, price_above: float = 0) -> None:
+
+        self.price_below: float = price_below
+        self.price_above: float = price_above
+
+    def __str__(self):
+        conditions = []
+        if self.price_below:
+            conditions.append(f"""below {self.price_below}""")
+        if self.price_above:
+            conditions.append(f"""above {self.price_above}""")
+        return " ".join(conditions)
+
+    def has_price(self) -> bool:
+        return bool(self.price_below or self.price_above)
+
+    def satisfied(self, price: Optional[float]) -> bool:
+
+        if not self.has_price():
+            return True
+        if price is None:
+            return False
+        if self.price_below and price > self.price_below:
+            return False
+        if self.price_above and price < self.price_above:
+            return False
+        return True
 
 
 class EmptyOrderList(Exception):
@@ -0,0 +1,313 @@
+from cihatbot.execution_order.execution_order import ExecutionOrder, EmptyExecutionOrder, SingleExecutionOrder, OrderStatus, OrderSnapshot
+from cihatbot.execution_order.codec import OrderCodec
+from threading import Thread, Lock, Event as Flag
+from typing import List, Optional, TextIO, Tuple
+import gc
+import json
+import os
+import time
+
+
+class Journal:
+    """
+    Write-ahead log of the mutations of an ExecutionOrder tree, one JSON record per line:
+    ["add", MODE, ORDER, ...]
+    ["intent", ORDER_ID, ...]
+    ["submit", ORDER_ID, EXTERNAL_ID, STATUS]
+    ["fill"|"cancel", EXTERNAL_ID]
+    ["delete", ORDER_ID]
+
+    Records are written by the trader thread and made durable in batches by a
+    background thread, so a crash loses at most the last SYNC_INTERVAL seconds.
+    Intents are synced before the orders are sent, so an order whose outcome was
+    lost comes back SUBMITTING and can be looked up on the exchange by its id.
+
+    The journal is split in numbered segments. A snapshot numbered N holds the
+    tree as it was before segment N, once it is written the older segments and
+    snapshots are deleted, and recovery starts from it instead of from scratch.
+    An add counts as one record per order, so that recovery never replays more
+    than SNAPSHOT_RECORDS orders on top of the snapshot.
+    """
+
+    OP_ADD = "add"
+    OP_INTENT = "intent"
+    OP_SUBMIT = "submit"
+    OP_FILL = "fill"
+    OP_CANCEL = "cancel"
+    OP_DELETE = "delete"
+
+    SEGMENT_PREFIX = "journal-"
+    SEGMENT_SUFFIX = ".log"
+    SNAPSHOT_PREFIX = "snapshot-"
+    SNAPSHOT_SUFFIX = ".json"
+    TEMPORARY_SUFFIX = ".tmp"
+    SYNC_INTERVAL = 0.05
+    SNAPSHOT_INTERVAL = 3600
+    SNAPSHOT_RECORDS = 20000
+
+    def __init__(self, directory: str) -> None:
+        self.directory: str = directory
+        self.segment: int = 0
+        self.file: Optional[TextIO] = None
+        self.lock: Lock = Lock()
+        self.sync_lock: Lock = Lock()
+        self.dirty: bool = False
+        self.stopped: Flag = Flag()
+        self.syncer: Thread = Thread(target=self._sync_loop, daemon=True)
+        self.snapshotter: Thread = Thread()
+        self.records: int = 0
+        self.snapshot_time: float = time.time()
+
+    def replay(self) -> ExecutionOrder:
+        """
+        Rebuilds the tree from the last snapshot and the segments after it, then opens
+        the last one for appending. The cyclic garbage collector is paused meanwhile:
+        recovery creates no garbage, but allocating a large tree triggers collections
+        that rescan all of it and take most of the time.
+        """
+
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._replay()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _replay(self) -> ExecutionOrder:
+
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith(Journal.TEMPORARY_SUFFIX):
+                os.remove(os.path.join(self.directory, name))
+        snapshots = self._numbers(Journal.SNAPSHOT_PREFIX, Journal.SNAPSHOT_SUFFIX)
+
+        root = EmptyExecutionOrder()
+        first = 1
+        if snapshots:
+            first = snapshots[-1]
+            with open(self._path(Journal.SNAPSHOT_PREFIX, first, Journal.SNAPSHOT_SUFFIX), "r") as file:
+                root = OrderCodec.decode(json.load(file))
+
+        segments = [segment for segment in self._numbers(Journal.SEGMENT_PREFIX, Journal.SEGMENT_SUFFIX) if segment >= first]
+        valid = 0
+        for segment in segments:
+            root, valid = self._replay_segment(segment, root)
+
+        self.segment = segments[-1] if segments else first
+        path = self._path(Journal.SEGMENT_PREFIX, self.segment, Journal.SEGMENT_SUFFIX)
+        if segments:
+            os.truncate(path, valid)
+        self.file = open(path, "a")
+        self._compact(first)
+        return root
+
+    def start(self) -> None:
+        self.syncer.start()
+
+    def add(self, orders: List[ExecutionOrder], mode: str) -> None:
+        self._append([Journal.OP_ADD, mode, *[OrderCodec.encode(order) for order in orders]], len(orders))
+
+    def intent(self, orders: List[SingleExecutionOrder]) -> None:
+        """ Records that orders are about to be sent, the caller syncs before sending them """
+        self._append([Journal.OP_INTENT, *[order.order_id for order in orders]])
+
+    def submit(self, order: SingleExecutionOrder, status: OrderStatus) -> None:
+        self._append([Journal.OP_SUBMIT, order.order_id, order.external_id, status.name])
+
+    def fill(self, external_id: int) -> None:
+        self._append([Journal.OP_FILL, external_id])
+
+    def cancel(self, external_id: int) -> None:
+        self._append([Journal.OP_CANCEL, external_id])
+
+    def delete(self, order_id: str) -> None:
+        self._append([Journal.OP_DELETE, order_id])
+
+    def needs_snapshot(self) -> bool:
+
+        if self.snapshotter.is_alive() or not self.records:
+            return False
+        return self.records >= Journal.SNAPSHOT_RECORDS or time.time() - self.snapshot_time >= Journal.SNAPSHOT_INTERVAL
+
+    def checkpoint(self, snapshot: OrderSnapshot) -> None:
+        """ Starts a new segment and writes snapshot, the tree at this point, in the background """
+
+        with self.sync_lock:
+            with self.lock:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.segment += 1
+                self.file = open(self._path(Journal.SEGMENT_PREFIX, self.segment, Journal.SEGMENT_SUFFIX), "a")
+                self.dirty = False
+
+        self.records = 0
+        self.snapshot_time = time.time()
+        self.snapshotter = Thread(target=self._write_snapshot, args=(self.segment, snapshot), daemon=True)
+        self.snapshotter.start()
+
+    def sync(self) -> None:
+
+        with self.sync_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                self.file.flush()
+                self.dirty = False
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+
+        self.stopped.set()
+        if self.syncer.is_alive():
+            self.syncer.join()
+        if self.snapshotter.is_alive():
+            self.snapshotter.join()
+        if self.file:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def apply(root: ExecutionOrder, record: List) -> ExecutionOrder:
+
+        op = record[0]
+
+        if op == Journal.OP_ADD:
+            orders = [OrderCodec.decode(data) for data in record[2:]]
+            if record[1] == "sequent":
+                return root.add_sequential_all(orders)
+            return root.add_parallel_all(orders)
+
+        elif op == Journal.OP_INTENT:
+            for order_id in record[1:]:
+                root.update(order_id, OrderStatus.SUBMITTING, 0)
+
+        elif op == Journal.OP_SUBMIT:
+            root.update(record[1], OrderStatus[record[3]], record[2])
+
+        elif op == Journal.OP_FILL or op == Journal.OP_CANCEL:
+            return root.remove(external_id=record[1])
+
+        elif op == Journal.OP_DELETE:
+            return root.cancel(lambda order: None, order_id=record[1])
+
+        return root
+
+    def _append(self, record: List, weight: int = 1) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+            self.dirty = True
+        self.records += weight
+
+    def _sync_loop(self) -> None:
+        while not self.stopped.wait(Journal.SYNC_INTERVAL):
+            self.sync()
+
+    def _write_snapshot(self, segment: int, snapshot: OrderSnapshot) -> None:
+        """ Writes to a temporary file renamed once complete, so a crash never leaves a partial snapshot """
+
+        path = self._path(Journal.SNAPSHOT_PREFIX, segment, Journal.SNAPSHOT_SUFFIX)
+        with open(path + Journal.TEMPORARY_SUFFIX, "w") as file:
+            json.dump(OrderCodec.encode(snapshot), file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + Journal.TEMPORARY_SUFFIX, path)
+
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+        self._compact(segment)
+
+    def _compact(self, first: int) -> None:
+        """ Deletes the segments and snapshots made obsolete by the snapshot numbered first """
+
+        for name in os.listdir(self.directory):
+            if name.endswith(Journal.TEMPORARY_SUFFIX):
+                continue
+            for prefix, suffix in ((Journal.SEGMENT_PREFIX, Journal.SEGMENT_SUFFIX), (Journal.SNAPSHOT_PREFIX, Journal.SNAPSHOT_SUFFIX)):
+                number = Journal._number(name, prefix, suffix)
+                if number is not None and number < first:
+                    os.remove(os.path.join(self.directory, name))
+
+    def _replay_segment(self, segment: int, root: ExecutionOrder) -> Tuple[ExecutionOrder, int]:
+        """ Applies the records of a segment, stopping at a line left incomplete by a crash """
+
+        with open(self._path(Journal.SEGMENT_PREFIX, segment, Journal.SEGMENT_SUFFIX), "r") as file:
+            lines = file.read().split("\n")
+        lines.pop()
+
+        try:
+            records = json.loads(f"""[{",".join(lines)}]""")
+        except ValueError:
+            records = Journal._parse_lines(lines)
+
+        valid = 0
+        for line, record in zip(lines, records):
+            root = Journal.apply(root, record)
+            valid += len(line) + 1
+            self.records += len(record) - 2 if record[0] == Journal.OP_ADD else 1
+        return root, valid
+
+    @staticmethod
+    def _parse_lines(lines: List[str]) -> List[List]:
+        """ Slow path for a segment with a corrupted record, keeps the records before it """
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        return records
+
+    def _numbers(self, prefix: str, suffix: str) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            number = Journal._number(name, prefix, suffix)
+            if number is not None:
+                numbers.append(number)
+        numbers.sort()
+        return numbers
+
+    @staticmethod
+    def _number(name: str, prefix: str, suffix: str) -> Optional[int]:
+        if name.startswith(prefix) and name.endswith(suffix):
+            return int(name[len(prefix):-len(suffix)])
+        return None
+
+    def _path(self, prefix: str, number: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"""{prefix}{number:08d}{suffix}""")
+
+
+class EmptyJournal(Journal):
+    """ Used when no journal directory is configured, keeps the tree in memory only """
+
+    def __init__(self) -> None:
+        super().__init__("")
+
+    def replay(self) -> ExecutionOrder:
+        return EmptyExecutionOrder()
+
+    def start(self) -> None:
+        pass
+
+    def add(self, orders: List[ExecutionOrder], mode: str) -> None:
+        pass
+
+    def needs_snapshot(self) -> bool:
+        return False
+
+    def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _append(self, record: List, weight: int = 1) -> None:
+        pass
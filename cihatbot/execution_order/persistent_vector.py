@@ -0,0 +1,85 @@
+from __future__ import annotations
+from typing import Any, Iterator, List, Tuple
+
+
+class PersistentVector:
+    """
+    Immutable sequence stored as a tree of tuples of up to BRANCHING items, so that
+    set returns a new version copying only the O(log n) tuples on the path to the
+    item and sharing all the others with the previous version. Setting the index
+    right after the last one appends. None items are holes, skipped by iteration
+    and not counted by len, which lets removals keep the other indexes stable.
+    """
+
+    __slots__ = ("root", "shift", "size", "count")
+
+    BITS = 5
+    BRANCHING = 1 << BITS
+    MASK = BRANCHING - 1
+
+    def __init__(self, root: Tuple = (), shift: int = 0, size: int = 0, count: int = 0) -> None:
+        self.root: Tuple = root
+        self.shift: int = shift
+        self.size: int = size
+        self.count: int = count
+
+    @staticmethod
+    def of(items: List[Any]) -> PersistentVector:
+        """ Builds a vector of items in O(n), bottom up """
+
+        nodes = [tuple(items[start:start + PersistentVector.BRANCHING]) for start in range(0, len(items), PersistentVector.BRANCHING)]
+        shift = 0
+        while len(nodes) > 1:
+            nodes = [tuple(nodes[start:start + PersistentVector.BRANCHING]) for start in range(0, len(nodes), PersistentVector.BRANCHING)]
+            shift += PersistentVector.BITS
+        root = nodes[0] if nodes else ()
+        return PersistentVector(root, shift, len(items), sum(1 for item in items if item is not None))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Any]:
+        return PersistentVector._items(self.root, self.shift)
+
+    def get(self, index: int) -> Any:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        node = self.root
+        shift = self.shift
+        while shift:
+            node = node[(index >> shift) & PersistentVector.MASK]
+            shift -= PersistentVector.BITS
+        return node[index & PersistentVector.MASK]
+
+    def set(self, index: int, item: Any) -> PersistentVector:
+        """ New version with item at index, which may be size to append """
+
+        if not 0 <= index <= self.size:
+            raise IndexError(index)
+
+        previous = self.get(index) if index < self.size else None
+        root = self.root
+        shift = self.shift
+        if index >> shift >= PersistentVector.BRANCHING:
+            root = (root,)
+            shift += PersistentVector.BITS
+
+        count = self.count + (item is not None) - (previous is not None)
+        return PersistentVector(PersistentVector._set(root, shift, index, item), shift, max(self.size, index + 1), count)
+
+    @staticmethod
+    def _set(node: Tuple, shift: int, index: int, item: Any) -> Tuple:
+        position = (index >> shift) & PersistentVector.MASK
+        if shift:
+            item = PersistentVector._set(node[position] if position < len(node) else (), shift - PersistentVector.BITS, index, item)
+        return node[:position] + (item,) + node[position + 1:]
+
+    @staticmethod
+    def _items(node: Tuple, shift: int) -> Iterator[Any]:
+        if not shift:
+            for item in node:
+                if item is not None:
+                    yield item
+            return
+        for child in node:
+            yield from PersistentVector._items(child, shift - PersistentVector.BITS)
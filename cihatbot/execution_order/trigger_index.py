@@ -0,0 +1,56 @@
+from __future__ import annotations
+from cihatbot.execution_order.execution_order import SingleExecutionOrder
+from typing import Dict, List, Tuple, Optional
+from itertools import count
+import heapq
+
+
+class TriggerIndex:
+    """
+    Orders waiting for a price condition, kept per symbol in two heaps: a max-heap
+    on price_below (fires when the price falls to it) and a min-heap on price_above
+    (fires when the price rises to it). A price update pops the k triggered orders
+    in O(k log n) without looking at the others.
+    """
+
+    def __init__(self) -> None:
+        self.below: Dict[str, List[Tuple[float, int, SingleExecutionOrder]]] = {}
+        self.above: Dict[str, List[Tuple[float, int, SingleExecutionOrder]]] = {}
+        self.sequence = count()
+
+    def __len__(self) -> int:
+        return sum(len(heap) for heap in self.below.values()) + sum(len(heap) for heap in self.above.values())
+
+    def add(self, order: SingleExecutionOrder, price: Optional[float]) -> bool:
+        """
+        Parks order on the bound that the current price (if known) does not satisfy,
+        returns False if the price satisfies both bounds and nothing was parked
+        """
+
+        symbol = order.params.symbol
+        conditions = order.conditions
+
+        if conditions.price_below and (price is None or price > conditions.price_below):
+            heap = self.below.setdefault(symbol, [])
+            heapq.heappush(heap, (-conditions.price_below, next(self.sequence), order))
+        elif conditions.price_above and (price is None or price < conditions.price_above):
+            heap = self.above.setdefault(symbol, [])
+            heapq.heappush(heap, (conditions.price_above, next(self.sequence), order))
+        else:
+            return False
+        return True
+
+    def pop(self, symbol: str, price: float) -> List[SingleExecutionOrder]:
+        """ Removes and returns the orders whose bound is reached at price """
+
+        triggered = []
+
+        heap = self.below.get(symbol)
+        while heap and -heap[0][0] >= price:
+            triggered.append(heapq.heappop(heap)[2])
+
+        heap = self.above.get(symbol)
+        while heap and heap[0][0] <= price:
+            triggered.append(heapq.heappop(heap)[2])
+
+        return triggered
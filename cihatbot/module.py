@@ -1,6 +1,6 @@
-from cihatbot.events import Event, EventEmitter, EventListener
+from cihatbot.events import Event, EventEmitter, EventListener, QueueMetrics
 from threading import Thread
-from typing import Dict
+from typing import Callable, Dict, Type
 
 
 class Module(Thread):
@@ -9,7 +9,8 @@ class Module(Thread):
         super().__init__()
         self.config: Dict = config
         self.emitter: EventEmitter = EventEmitter()
-        self.listener: EventListener = EventListener()
+        self.handlers: Dict[Type[Event], Callable[[Event], None]] = self.get_handlers()
+        self.listener: EventListener = EventListener(self.handlers, int(config.get("queue_capacity") or 0), type(self).__name__)
 
     def emit(self, event: Event) -> None:
         self.emitter.emit(event)
@@ -17,6 +18,13 @@ class Module(Thread):
     def add_listener(self, listener: EventListener):
         self.emitter.add_listener(listener)
 
+    def metrics(self) -> QueueMetrics:
+        return self.listener.queue.metrics()
+
+    def get_handlers(self) -> Dict[Type[Event], Callable[[Event], None]]:
+        """ Handler of each event class the module subscribes to, other events are never delivered to it """
+        return {}
+
     def pre_run(self) -> None:
         pass
 
@@ -26,7 +34,9 @@ class Module(Thread):
         self.post_run()
 
     def on_event(self, event: Event) -> None:
-        pass
+        handler = self.handlers.get(type(event))
+        if handler:
+            handler(event)
 
     def post_run(self):
         pass
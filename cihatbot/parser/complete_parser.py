@@ -6,66 +6,132 @@ from cihatbot.execution_order.execution_order import (
     SequentExecutionOrder,
     ExecutionConditions,
     ExecutionParams)
-from typing import List
+from typing import List, Tuple
 import re
 import time
 
 
+class Tokens:
+    """ Cursor over the tokens of an order string, raising InvalidString on unexpected ones """
+
+    def __init__(self, order_string: str, tokens: List[Tuple[str, str, int]]) -> None:
+        self.order_string: str = order_string
+        self.tokens: List[Tuple[str, str, int]] = tokens
+        self.position: int = 0
+
+    def peek(self) -> Tuple[str, str, int]:
+        return self.tokens[self.position]
+
+    def next(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.position]
+        if not token[0] == "end":
+            self.position += 1
+        return token
+
+    def expect(self, kind: str, expected: str) -> str:
+        token = self.next()
+        if not token[0] == kind:
+            self.error(token, expected)
+        return token[1]
+
+    def expect_word(self, words: Tuple[str, ...]) -> str:
+        token = self.next()
+        if not token[0] == "word" or token[1] not in words:
+            self.error(token, " or ".join(f"""'{word}'""" for word in words))
+        return token[1]
+
+    def expect_pattern(self, kind: str, pattern: re.Pattern, expected: str) -> str:
+        token = self.next()
+        if not token[0] == kind or not pattern.fullmatch(token[1]):
+            self.error(token, expected)
+        return token[1]
+
+    def error(self, token: Tuple[str, str, int], expected: str) -> None:
+        found = f"""'{token[1]}'""" if token[1] else "end of string"
+        raise InvalidString(self.order_string, f"""expected {expected} at position {token[2]}, found {found}""")
+
+
 class CompleteParser(Parser):
+    """
+    Input syntax:
+    order = {SINGLE|PARALLEL|SEQUENT}
+    single = {buy|sell} SYMBOL PRICE QUANTITY[ when {below|above} PRICE]
+    parallel = [p ORDER[, ORDER, ...]]
+    sequent = [s ORDER[, ORDER, ...]]
+
+    Example:
+    [p buy ATOMBUSD 20.0 10.0, [s buy ADABUSD 0.9 10.0, sell ADABUSD 1.5 10.0 when above 1.4]]
+
+    The string is tokenized in a single pass and parsed by recursive descent, so
+    parsing is linear in its length and errors report the position where they are found.
+    """
 
-    single_pattern = re.compile("(?P<command>buy|sell) (?P<symbol>[A-Z]+) (?P<price>[0-9]+[.][0-9]+) (?P<quantity>[0-9]+[.][0-9]+)")
-    parallel_pattern = re.compile("\[p (?P<list>[A-Za-z0-9., \[\]]*)\]")
-    sequent_pattern = re.compile("\[s (?P<list>[A-Za-z0-9., \[\]]*)\]")
+    token_pattern = re.compile(r"(?P<space>\s+)|(?P<open>\[)|(?P<close>\])|(?P<comma>,)|(?P<number>[0-9.]+)|(?P<word>[A-Za-z]+)")
+    number_pattern = re.compile("[0-9]+[.][0-9]+")
+    symbol_pattern = re.compile("[A-Z]+")
 
     def parse(self, order_string: str) -> ExecutionOrder:
 
-        order_string = order_string.lstrip().rstrip()
-
-        single_match = self.single_pattern.fullmatch(order_string)
-        parallel_match = self.parallel_pattern.fullmatch(order_string)
-        sequent_match = self.sequent_pattern.fullmatch(order_string)
-
-        if single_match:
-            return SingleExecutionOrder(
-                time.time(),
-                ExecutionParams(
-                    single_match.group("command"),
-                    single_match.group("symbol"),
-                    float(single_match.group("price")),
-                    float(single_match.group("quantity"))
-                ),
-                ExecutionConditions()
-            )
-
-        elif parallel_match:
-            orders_str = parallel_match.group("list")
-            orders = []
-            for order in CompleteParser._split_order_list(orders_str):
-                orders.append(self.parse(order))
+        tokens = Tokens(order_string, self._tokenize(order_string))
+        try:
+            order = self._parse_order(tokens)
+        except RecursionError:
+            raise InvalidString(order_string, "orders nested too deeply")
+        tokens.expect("end", "end of string")
+        return order
+
+    def _tokenize(self, order_string: str) -> List[Tuple[str, str, int]]:
+        """ Splits order_string in (KIND, TEXT, POSITION) tokens, closed by an end token """
+
+        tokens = []
+        position = 0
+        while position < len(order_string):
+            match = self.token_pattern.match(order_string, position)
+            if not match:
+                raise InvalidString(order_string, f"""unexpected character '{order_string[position]}' at position {position}""")
+            if not match.lastgroup == "space":
+                tokens.append((match.lastgroup, match.group(), position))
+            position = match.end()
+        tokens.append(("end", "", position))
+        return tokens
+
+    def _parse_order(self, tokens: Tokens) -> ExecutionOrder:
+
+        if tokens.peek()[0] == "open":
+            return self._parse_multiple(tokens)
+        return self._parse_single(tokens)
+
+    def _parse_multiple(self, tokens: Tokens) -> ExecutionOrder:
+
+        tokens.expect("open", "'['")
+        kind = tokens.expect_word(("p", "s"))
+
+        orders = [self._parse_order(tokens)]
+        while tokens.peek()[0] == "comma":
+            tokens.next()
+            orders.append(self._parse_order(tokens))
+        tokens.expect("close", "',' or ']'")
+
+        if kind == "p":
             return ParallelExecutionOrder(orders)
+        return SequentExecutionOrder(orders)
+
+    def _parse_single(self, tokens: Tokens) -> ExecutionOrder:
+
+        command = tokens.expect_word((ExecutionParams.CMD_BUY, ExecutionParams.CMD_SELL))
+        symbol = tokens.expect_pattern("word", self.symbol_pattern, "symbol")
+        price = tokens.expect_pattern("number", self.number_pattern, "price")
+        quantity = tokens.expect_pattern("number", self.number_pattern, "quantity")
+
+        trigger = None
+        trigger_price = None
+        if tokens.peek()[1] == "when":
+            tokens.next()
+            trigger = tokens.expect_word(("below", "above"))
+            trigger_price = tokens.expect_pattern("number", self.number_pattern, "trigger price")
 
-        elif sequent_match:
-            orders_str = sequent_match.group("list")
-            orders = []
-            for order in CompleteParser._split_order_list(orders_str):
-                orders.append(self.parse(order))
-            return SequentExecutionOrder(orders)
-
-        else:
-            raise InvalidString(order_string)
-
-    @staticmethod
-    def _split_order_list(order_list: str) -> List[str]:
-        parenthesis = 0
-        start = 0
-        result_list = []
-        for char in range(len(order_list)):
-            if order_list[char] == "," and parenthesis == 0:
-                result_list.append(order_list[start:char].lstrip().rstrip())
-                start = char + 1
-            elif order_list[char] == "[":
-                parenthesis += 1
-            elif order_list[char] == "]":
-                parenthesis -= 1
-        result_list.append(order_list[start:len(order_list)].lstrip().rstrip())
-        return result_list
+        return SingleExecutionOrder(
+            time.time(),
+            self._get_params(command, symbol, float(price), float(quantity)),
+            self._get_conditions(trigger, trigger_price)
+        )
@@ -5,19 +5,76 @@ from cihatbot.execution_order.execution_order import (
     SequentExecutionOrder,
     ExecutionConditions,
     ExecutionParams)
-from typing import List
+from cihatbot.connector.filters import ExchangeFilters, FilterException
+from typing import Iterable, Iterator, List
 import re
 import time
 import calendar
 
 
+class InvalidString(Exception):
+    def __init__(self, order_string: str, message: str = ""):
+        self.order_string = order_string
+        self.message = message
+
+
 class Parser:
 
+    COMMENT = "#"
+    MAX_ERRORS = 10
+
+    def __init__(self, filters: ExchangeFilters = None) -> None:
+        self.filters: ExchangeFilters = filters
+
     def parse(self, order_string: str) -> ExecutionOrder:
         pass
 
+    def parse_lines(self, lines: Iterable[str], errors: List[InvalidString] = None) -> Iterator[ExecutionOrder]:
+        """ Lazily parses one order per line, skipping blank lines and comments, invalid lines go to errors if given """
 
-class InvalidString(Exception):
-    def __init__(self, order_string: str):
-        self.order_string = order_string
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith(Parser.COMMENT):
+                continue
+            try:
+                yield self.parse(line)
+            except InvalidString as invalid_string:
+                error = InvalidString(line, f"""line {number}: {invalid_string.message or "invalid order"}""")
+                if errors is None:
+                    raise error
+                errors.append(error)
+
+    def parse_batch(self, lines: Iterable[str]) -> List[ExecutionOrder]:
+        """ Parses every line before returning, so that a batch is either valid as a whole or rejected with its errors """
+
+        errors = []
+        orders = list(self.parse_lines(lines, errors))
+        if errors:
+            messages = [error.message for error in errors[:Parser.MAX_ERRORS]]
+            if len(errors) > Parser.MAX_ERRORS:
+                messages.append(f"""and {len(errors) - Parser.MAX_ERRORS} more""")
+            raise InvalidString(f"""{len(errors)} invalid lines""", "\n".join(messages))
+        if not orders:
+            raise InvalidString("", "no orders found")
+        return orders
+
+    def _get_params(self, command: str, symbol: str, price: float, quantity: float) -> ExecutionParams:
+        """ Builds params already rounded to the exchange filters, so invalid orders never reach the trader """
+
+        params = ExecutionParams(command, symbol, price, quantity)
+        if not self.filters:
+            return params
+
+        try:
+            return self.filters.validate(params)
+        except FilterException as exception:
+            raise InvalidString(f"""{command} {symbol} {price} {quantity}""", exception.message)
 
+    @staticmethod
+    def _get_conditions(trigger: str = None, trigger_price: str = None) -> ExecutionConditions:
+        if trigger == "below":
+            return ExecutionConditions(price_below=float(trigger_price))
+        elif trigger == "above":
+            return ExecutionConditions(price_above=float(trigger_price))
+        else:
+            return ExecutionConditions()
@@ -6,7 +6,7 @@ from cihatbot.execution_order.execution_order import (
     SequentExecutionOrder,
     ExecutionConditions,
     ExecutionParams)
-from typing import List
+from typing import List, Tuple
 import time
 import re
 import calendar
@@ -17,13 +17,15 @@ class SimpleParser(Parser):
     Input syntax:
     root = [DATETIME ]SYMBOL buy BUY_ORDER[, BUY_ORDER, ...] and sell SELL_ORDER[, SELL_ORDER, ...]
     datetime = DD.MM.YYYY HH:MM
-    buy_order = {RIGHT_BUY_ORDER|LEFT_BUY_ORDER}
+    buy_order = {RIGHT_BUY_ORDER|LEFT_BUY_ORDER}[ CONDITION]
     right_buy_order = RIGHT_QUANTITY at PRICE
     left_buy_order = at PRICE for LEFT_QUANTITY
-    sell_order = PERCENTAGE at PRICE
+    sell_order = PERCENTAGE at PRICE[ CONDITION]
+    condition = when {below|above} PRICE
 
     Example:
     25.03.2021 06:00 BTCBUSD buy 0.0002 at 55000, 0.0002 at 57000, at 59000 for 10 and sell 70% at 65000, 30% at 70000
+    BTCBUSD buy 0.0002 at 0 when above 60000 and sell 100% at 0 when below 58000
     """
 
     root_long = re.compile("^(?P<datetime>(\d\d\.\d\d\.\d\d\d\d \d\d:\d\d )?)(?P<symbol>[A-Z]+) (?P<primary_command>buy|sell) (?P<primary_orders>.+) and (?P<secondary_command>buy|sell) (?P<secondary_orders>.+)$")
@@ -79,8 +81,9 @@ class SimpleParser(Parser):
             raise InvalidString(command_str)
 
         primary_orders = []
-        for order in primary_orders_str:
+        for order_str in primary_orders_str:
 
+            order, conditions = self._split_conditions(order_str)
             right_match = self.right_primary.match(order)
             left_match = self.left_primary.match(order)
 
@@ -95,8 +98,8 @@ class SimpleParser(Parser):
 
             primary_orders.append(SingleExecutionOrder(
                 datetime,
-                ExecutionParams(command, symbol, price, quantity),
-                ExecutionConditions()
+                self._get_params(command, symbol, price, quantity),
+                conditions
             ))
 
         return primary_orders
@@ -113,8 +116,9 @@ class SimpleParser(Parser):
             raise InvalidString(command_str)
 
         secondary_orders = []
-        for order in secondary_orders_str:
+        for order_str in secondary_orders_str:
 
+            order, conditions = self._split_conditions(order_str)
             secondary_match = self.secondary.match(order)
             if not secondary_match:
                 raise InvalidString(order)
@@ -125,12 +129,21 @@ class SimpleParser(Parser):
 
             secondary_orders.append(SingleExecutionOrder(
                 datetime,
-                ExecutionParams(command, symbol, price, quantity),
-                ExecutionConditions()
+                self._get_params(command, symbol, price, quantity),
+                conditions
             ))
 
         return secondary_orders
 
+    condition = re.compile("^(?P<order>.+) when (?P<trigger>below|above) (?P<trigger_price>\d+\.?\d*)$")
+
+    def _split_conditions(self, order_str: str) -> Tuple[str, ExecutionConditions]:
+        condition_match = self.condition.match(order_str)
+        if condition_match:
+            return condition_match["order"], self._get_conditions(condition_match["trigger"], condition_match["trigger_price"])
+        else:
+            return order_str, self._get_conditions()
+
     datetime = re.compile("^(?P<day>\d\d)\.(?P<month>\d\d)\.(?P<year>\d\d\d\d) (?P<hour>\d\d):(?P<minute>\d\d) $")
 
     def _get_datetime(self, datetime: str) -> float:
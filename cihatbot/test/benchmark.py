@@ -0,0 +1,221 @@
+from cihatbot.events import EventEmitter, EventListener, ConnectEvent, AddEvent, TickerEvent
+from cihatbot.execution_order.execution_order import (
+    ExecutionOrder,
+    SingleExecutionOrder,
+    ParallelExecutionOrder,
+    ExecutionParams,
+    ExecutionConditions,
+    OrderStatus)
+from cihatbot.parser.simple_parser import SimpleParser
+from cihatbot.parser.complete_parser import CompleteParser
+from cihatbot.connector.connector import Connector
+from cihatbot.connector.market import Market
+from cihatbot.trader.real import RealTrader
+from threading import Thread, Event as Flag
+from typing import Callable, Dict, List
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+
+
+class FakeConnector(Connector):
+    """ Accepts every order instantly and records when submit_all was called """
+
+    def __init__(self, market: Market):
+        super().__init__(market)
+        self.next_id: int = 0
+        self.submitted: Flag = Flag()
+        self.submitted_at: float = 0.0
+
+    def submit(self, execution_order: SingleExecutionOrder) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def submit_all(self, execution_orders: List[SingleExecutionOrder]) -> List[int]:
+        self.submitted_at = time.perf_counter()
+        results = super().submit_all(execution_orders)
+        self.submitted.set()
+        return results
+
+
+class Benchmark:
+    """
+    Reproducible measurements of the hot paths, printed as JSON so that runs of
+    different releases can be compared:
+    python -m cihatbot.test.benchmark [--sizes 10 1000 100000] [--output FILE]
+    """
+
+    SIMPLE_ORDER = "BTCBUSD buy 0.0002 at 55000, 0.0002 at 57000 and sell 70% at 65000, 30% at 70000"
+    COMPLETE_ORDER = "[p buy ATOMBUSD 20.0 10.0, " \
+                     "[s [p buy ADABUSD 0.9 10.0, buy ADABUSD 1.0 10.0, buy ADABUSD 1.2 10.0], sell ADABUSD 1.5 30.0], " \
+                     "[s [p buy ETHBUSD 1700.0 0.5, buy ETHBUSD 1500.0 0.5], sell ETHBUSD 2000.0 1.0], " \
+                     "buy DOTBUSD 35.0 10.0]"
+
+    def __init__(self, sizes: List[int], samples: int) -> None:
+        self.sizes: List[int] = sizes
+        self.samples: int = samples
+        self.results: List[Dict] = []
+
+    def run(self) -> Dict:
+        self.bench_parsers()
+        for size in self.sizes:
+            self.bench_tree(size)
+        self.bench_event_bus()
+        self.bench_tick_to_submit()
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+            "results": self.results
+        }
+
+    def bench_parsers(self) -> None:
+        simple_parser = SimpleParser()
+        complete_parser = CompleteParser()
+        self._throughput("parser.simple.parse", 1, self.samples, lambda: simple_parser.parse(Benchmark.SIMPLE_ORDER))
+        self._throughput("parser.complete.parse", 1, self.samples, lambda: complete_parser.parse(Benchmark.COMPLETE_ORDER))
+
+    def bench_tree(self, size: int) -> None:
+        orders = [Benchmark._single(index) for index in range(size)]
+
+        root = ParallelExecutionOrder([Benchmark._single(-1)])
+        start = time.perf_counter()
+        for order in orders:
+            root = root.add_parallel(order)
+        self._record("tree.add_parallel", size, size, time.perf_counter() - start)
+
+        def submit_none(ready: List[SingleExecutionOrder]) -> List[OrderStatus]:
+            return [OrderStatus.PENDING] * len(ready)
+
+        start = time.perf_counter()
+        root.submit(submit_none)
+        self._record("tree.index", size, 1, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        root.submit(submit_none)
+        self._record("tree.submit.idle", size, 1, time.perf_counter() - start)
+
+        def submit_all(ready: List[SingleExecutionOrder]) -> List[OrderStatus]:
+            for order in ready:
+                order.external_id = int(order.params.price)
+            return [OrderStatus.SUBMITTED] * len(ready)
+
+        start = time.perf_counter()
+        root.submit(submit_all)
+        self._record("tree.submit", size, size, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for order in orders[:size // 2]:
+            root = root.remove(external_id=order.external_id)
+        self._record("tree.remove", size, size // 2, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for order in orders[size // 2:]:
+            root = root.cancel(lambda cancelled: None, order_id=order.order_id)
+        self._record("tree.cancel", size, size - size // 2, time.perf_counter() - start)
+
+    def bench_event_bus(self) -> None:
+        forward = EventEmitter()
+        backward = EventEmitter()
+        echo = EventListener()
+        replies = EventListener()
+        forward.add_listener(echo)
+        backward.add_listener(replies)
+
+        thread = Thread(target=echo.listen, args=(backward.emit,))
+        thread.start()
+
+        latencies = []
+        for _ in range(self.samples):
+            start = time.perf_counter()
+            forward.emit(TickerEvent([]))
+            replies.queue.get()
+            latencies.append(time.perf_counter() - start)
+
+        echo.stop()
+        thread.join()
+        self._latency("events.round_trip", 1, latencies)
+
+    def bench_tick_to_submit(self) -> None:
+        market = Market()
+        connector = FakeConnector(market)
+        trader = RealTrader({}, connector)
+        trader.logger.logger.setLevel(logging.WARNING)
+        trader.start()
+        trader.listener.queue.put(ConnectEvent("", ""))
+
+        latencies = []
+        for index in range(min(self.samples, 1000)):
+            symbol = f"""SYM{index}"""
+            market.prices.update(symbol, 1.0, 0.0, time.time())
+            order = SingleExecutionOrder(0, ExecutionParams(ExecutionParams.CMD_BUY, symbol, 0, 1.0), ExecutionConditions(price_above=2.0))
+            trader.listener.queue.put(AddEvent([order], "parallel"))
+            while not order.status == OrderStatus.WAITING:
+                time.sleep(0)
+
+            connector.submitted.clear()
+            start = time.perf_counter()
+            market.prices.update(symbol, 2.0, 0.0, time.time())
+            market.emit(TickerEvent([symbol]))
+            connector.submitted.wait()
+            latencies.append(connector.submitted_at - start)
+
+        trader.stop()
+        trader.join()
+        self._latency("trader.tick_to_submit", 1, latencies)
+
+    def _throughput(self, name: str, size: int, operations: int, func: Callable) -> None:
+        start = time.perf_counter()
+        for _ in range(operations):
+            func()
+        self._record(name, size, operations, time.perf_counter() - start)
+
+    def _record(self, name: str, size: int, operations: int, seconds: float) -> None:
+        self.results.append({
+            "name": name,
+            "size": size,
+            "operations": operations,
+            "seconds": seconds,
+            "ops_per_second": operations / seconds if seconds else None,
+            "us_per_op": seconds / operations * 1e6 if operations else None
+        })
+
+    def _latency(self, name: str, size: int, latencies: List[float]) -> None:
+        latencies.sort()
+        self.results.append({
+            "name": name,
+            "size": size,
+            "operations": len(latencies),
+            "p50_us": statistics.median(latencies) * 1e6,
+            "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+            "max_us": latencies[-1] * 1e6
+        })
+
+    @staticmethod
+    def _single(index: int) -> ExecutionOrder:
+        return SingleExecutionOrder(0, ExecutionParams(ExecutionParams.CMD_BUY, "BTCBUSD", index + 2, 1.0), ExecutionConditions())
+
+
+def main() -> None:
+    argument_parser = argparse.ArgumentParser(description="Cihat-bot benchmarks")
+    argument_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    argument_parser.add_argument("--samples", type=int, default=10000)
+    argument_parser.add_argument("--output", type=str, default=None)
+    arguments = argument_parser.parse_args()
+
+    report = Benchmark(arguments.sizes, arguments.samples).run()
+
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
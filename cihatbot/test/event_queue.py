@@ -0,0 +1,103 @@
+from cihatbot.events import EventQueue, EventListener, QueuePolicy, UserEvent, TickerEvent, TimerEvent, ErrorEvent
+from cihatbot.connector.simulated import SimulatedConnector, SimulatedMarket
+from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionParams, ExecutionConditions
+from threading import Thread
+import time
+
+
+class EventQueueTest:
+
+    def test_drop_oldest(self):
+        queue = EventQueue(2)
+        for message in ("first", "second", "third"):
+            queue.put(ErrorEvent(None, message))
+        assert [queue.get().message for _ in range(2)] == ["second", "third"]
+        assert queue.metrics().dropped == 1
+        print("Drop oldest:", queue.metrics())
+
+    def test_drop_oldest_spares_blocking(self):
+        queue = EventQueue(2)
+        queue.put(UserEvent(1, "FILLED"))
+        queue.put(UserEvent(2, "FILLED"))
+        queue.put(ErrorEvent(None, "dropped"))
+        assert queue.qsize() == 2 and queue.metrics().dropped == 1
+        assert [queue.get().external_id for _ in range(2)] == [1, 2]
+        print("Drop oldest with only blocking events queued:", queue.metrics())
+
+    def test_coalesce(self):
+        queue = EventQueue(2)
+        queue.put(TickerEvent(["BTCBUSD"]))
+        queue.put(TickerEvent(["ETHBUSD", "BTCBUSD"]))
+        queue.put(TimerEvent())
+        queue.put(TimerEvent())
+        assert queue.qsize() == 2 and queue.metrics().coalesced == 2
+        assert queue.get().symbols == ["BTCBUSD", "ETHBUSD"]
+        assert isinstance(queue.get(), TimerEvent)
+        print("Coalesce:", queue.metrics())
+
+    def test_policy_override(self):
+        queue = EventQueue(1, {TickerEvent: QueuePolicy.DROP_OLDEST})
+        queue.put(TickerEvent(["BTCBUSD"]))
+        queue.put(TickerEvent(["ETHBUSD"]))
+        assert queue.get().symbols == ["ETHBUSD"] and queue.metrics().dropped == 1
+        print("Policy override:", queue.metrics())
+
+    def test_block(self):
+        queue = EventQueue(1)
+        queue.put(UserEvent(1, "FILLED"))
+        producer = Thread(target=queue.put, args=(UserEvent(2, "FILLED"),), daemon=True)
+        producer.start()
+        producer.join(0.2)
+        assert producer.is_alive(), "a full queue should block another producer"
+        assert queue.get().external_id == 1
+        producer.join(1)
+        assert not producer.is_alive() and queue.get().external_id == 2
+        print("Block:", queue.metrics())
+
+    def test_block_from_consumer(self):
+        queue = EventQueue(1)
+        consumer = Thread(target=self._consume_and_put, args=(queue,), daemon=True)
+        consumer.start()
+        queue.put(UserEvent(0, "FILLED"))
+        consumer.join(1)
+        assert not consumer.is_alive(), "the consumer blocked on its own queue"
+        assert queue.qsize() == 3 and queue.metrics().blocked == 0
+        print("Block from the consumer thread:", queue.metrics())
+
+    def test_stalled_trader(self):
+        market = SimulatedMarket()
+        market.prices.update("ADABUSD", 10.0, 0.0, time.time())
+        connector = SimulatedConnector(market)
+        listener = EventListener([UserEvent], 1)
+        connector.add_listener(listener)
+        connector.start_listen()
+        for _ in range(3):
+            connector.submit(SingleExecutionOrder(0, ExecutionParams("buy", "ADABUSD", 5.0, 1.0), ExecutionConditions()))
+
+        feeder = Thread(target=market.feed, args=("ADABUSD", 4.0), daemon=True)
+        feeder.start()
+        feeder.join(1)
+        assert not feeder.is_alive(), "the market blocked on the queue of a stalled trader"
+        closer = Thread(target=connector.stop_listen, daemon=True)
+        closer.start()
+        closer.join(1)
+        assert not closer.is_alive(), "closing the market deadlocked"
+        assert listener.queue.qsize() == 3 and listener.queue.metrics().blocked == 0
+        print("Fills to a stalled trader:", listener.queue.metrics())
+
+    @staticmethod
+    def _consume_and_put(queue: EventQueue):
+        queue.get()
+        for external_id in range(1, 4):
+            queue.put(UserEvent(external_id, "FILLED"))
+
+
+if __name__ == '__main__':
+    test = EventQueueTest()
+    test.test_drop_oldest()
+    test.test_drop_oldest_spares_blocking()
+    test.test_coalesce()
+    test.test_policy_override()
+    test.test_block()
+    test.test_block_from_consumer()
+    test.test_stalled_trader()
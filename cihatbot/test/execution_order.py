@@ -1,5 +1,6 @@
-from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionParams, ExecutionConditions
-from cihatbot.parser.parser import CompleteParser
+from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionParams, ExecutionConditions, OrderStatus
+from cihatbot.parser.complete_parser import CompleteParser
+from typing import List
 import time
 
 
@@ -15,28 +16,31 @@ class ExecutionOrderTest:
         print("Initialized order:", self.order)
 
     def test_execute(self):
-        def execute_func(order: SingleExecutionOrder):
-            print("Executing single order", order)
-            return True
+        def execute_func(orders: List[SingleExecutionOrder]):
+            for order in orders:
+                print("Executing single order", order)
+            return [OrderStatus.SUBMITTED for _ in orders]
         self.order.submit(execute_func)
         print("Order after execution:", self.order)
 
     def test_add(self):
         to_add_par = SingleExecutionOrder(
+            time.time(),
             ExecutionParams("buy", "BTCBUSD", 60000.0, 1),
-            ExecutionConditions(time.time())
+            ExecutionConditions()
         )
         to_add_seq = SingleExecutionOrder(
+            time.time(),
             ExecutionParams("sell", "BTCBUSD", 80000.0, 1),
-            ExecutionConditions(time.time())
+            ExecutionConditions()
         )
         self.order = self.order.add_parallel(to_add_par)
         self.order = self.order.add_sequential(to_add_seq)
         print("Order after add:", self.order)
 
     def test_delete(self):
-        to_remove = self.order.orders[1].orders[0].orders[2]
-        self.order.remove(to_remove)
+        to_remove = [order for order in self.order.singles() if order.params.symbol == "ADABUSD"][2]
+        self.order = self.order.remove(order_id=to_remove.order_id)
         print("Order after remove:", self.order)
 
 
@@ -47,4 +51,3 @@ if __name__ == '__main__':
     test.test_execute()
     test.test_delete()
     test.test_add()
-
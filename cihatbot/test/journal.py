@@ -0,0 +1,129 @@
+from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionParams, ExecutionConditions, OrderStatus
+from cihatbot.execution_order.journal import Journal
+from typing import List
+import os
+import tempfile
+import time
+
+
+class JournalTest:
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp()
+        self.journal = Journal(self.directory)
+        self.order = self.journal.replay()
+        self.journal.start()
+
+    @staticmethod
+    def single(price: float) -> SingleExecutionOrder:
+        return SingleExecutionOrder(0, ExecutionParams("buy", "BTCBUSD", price, 1.0), ExecutionConditions())
+
+    def add(self, orders: List[SingleExecutionOrder]):
+        self.journal.add(orders, "parallel")
+        self.order = self.order.add_parallel_all(orders)
+
+    def restart(self):
+        self.journal.close()
+        self.journal = Journal(self.directory)
+        self.order = self.journal.replay()
+        self.journal.start()
+
+    def prices(self) -> List[float]:
+        return [order.params.price for order in self.order.singles()]
+
+    def test_replay(self):
+        self.add([self.single(1.0), self.single(2.0)])
+        submitted = self.single(3.0)
+        self.add([submitted])
+        submitted.external_id = 7
+        self.journal.submit(submitted, OrderStatus.SUBMITTED)
+        self.journal.fill(7)
+        self.order = self.order.remove(external_id=7)
+        self.restart()
+        assert self.prices() == [1.0, 2.0]
+        print("Order after replay:", self.order)
+
+    def test_crash_truncation(self):
+        self.add([self.single(4.0)])
+        self.journal.sync()
+        path = self.journal._path(Journal.SEGMENT_PREFIX, self.journal.segment, Journal.SEGMENT_SUFFIX)
+        with open(path, "a") as file:
+            file.write('["add","parallel",["single","torn"')
+        size = os.path.getsize(path)
+        self.restart()
+        assert self.prices() == [1.0, 2.0, 4.0]
+        assert os.path.getsize(path) < size, "the torn record should be truncated"
+        self.add([self.single(5.0)])
+        self.restart()
+        assert self.prices() == [1.0, 2.0, 4.0, 5.0]
+        print("Order after a torn record:", self.order)
+
+    def test_snapshot(self):
+        self.journal.checkpoint(self.order.snapshot())
+        self.journal.snapshotter.join()
+        self.add([self.single(6.0)])
+        self.restart()
+        names = sorted(os.listdir(self.directory))
+        assert names == [f"""{Journal.SEGMENT_PREFIX}{self.journal.segment:08d}{Journal.SEGMENT_SUFFIX}""",
+                         f"""{Journal.SNAPSHOT_PREFIX}{self.journal.segment:08d}{Journal.SNAPSHOT_SUFFIX}"""], names
+        assert self.prices() == [1.0, 2.0, 4.0, 5.0, 6.0]
+        print("Order after snapshot recovery:", self.order)
+
+    def test_interrupted_submit(self):
+        orders = list(self.order.singles())
+        self.journal.intent(orders[:2])
+        self.journal.sync()
+        orders[0].external_id = 8
+        self.journal.submit(orders[0], OrderStatus.SUBMITTED)
+        self.restart()
+        statuses = [order.status for order in self.order.singles()]
+        assert statuses[:3] == [OrderStatus.SUBMITTED, OrderStatus.SUBMITTING, OrderStatus.PENDING], statuses
+        assert orders[1].order_id not in self.order.index.ready
+        print("Statuses after an interrupted submit:", statuses)
+
+    def test_large_replay(self):
+        """ A snapshot of a large book followed by as many fills, cancels and deletes as SNAPSHOT_RECORDS allows """
+
+        orders = [self.single(float(price)) for price in range(100000)]
+        self.add(orders)
+        submitted = orders[:80000]
+        for external_id, order in enumerate(submitted, 100):
+            self.order.update(order.order_id, OrderStatus.SUBMITTED, external_id)
+            self.journal.submit(order, OrderStatus.SUBMITTED)
+        self.journal.checkpoint(self.order.snapshot())
+        self.journal.snapshotter.join()
+
+        before = len(self.prices())
+        for order in submitted[0::10]:
+            self.journal.fill(order.external_id)
+            self.order = self.order.remove(external_id=order.external_id)
+        for order in submitted[5::10]:
+            self.journal.cancel(order.external_id)
+            self.order = self.order.remove(external_id=order.external_id)
+        for order in orders[80000::5]:
+            self.journal.delete(order.order_id)
+            self.order = self.order.cancel(lambda single: None, order_id=order.order_id)
+
+        expected = self.prices()
+        self.journal.close()
+        start = time.perf_counter()
+        self.journal = Journal(self.directory)
+        self.order = self.journal.replay()
+        elapsed = time.perf_counter() - start
+        self.journal.start()
+        assert self.prices() == expected
+        assert elapsed < 1.0, f"""replay took {elapsed:.2f}s"""
+        print(f"""Replayed a snapshot of {len(orders)} orders and {before - len(expected)} removals in {elapsed:.2f}s""")
+
+    def close(self):
+        self.journal.close()
+
+
+if __name__ == '__main__':
+    test = JournalTest()
+    test.test_replay()
+    test.test_crash_truncation()
+    test.test_snapshot()
+    test.test_interrupted_submit()
+    test.test_large_replay()
+    test.close()
@@ -0,0 +1,54 @@
+from cihatbot.parser.complete_parser import CompleteParser
+from cihatbot.parser.parser import InvalidString
+
+
+class ParserTest:
+
+    ERRORS = [
+        ("buy BTCBUSD 20.0", "expected quantity at position 16, found end of string"),
+        ("buy btcbusd 20.0 1.0", "expected symbol at position 4, found 'btcbusd'"),
+        ("buy BTCBUSD 20 1.0", "expected price at position 12, found '20'"),
+        ("hold BTCBUSD 20.0 1.0", "expected 'buy' or 'sell' at position 0, found 'hold'"),
+        ("buy BTCBUSD 20.0 1.0 when near 1.0", "expected 'below' or 'above' at position 26, found 'near'"),
+        ("buy BTCBUSD 20.0 1.0 $", "unexpected character '$' at position 21"),
+        ("[x buy BTCBUSD 20.0 1.0]", "expected 'p' or 's' at position 1, found 'x'"),
+        ("[p buy BTCBUSD 20.0 1.0 sell ADABUSD 1.0 1.0]", "expected ',' or ']' at position 24, found 'sell'"),
+        ("[s buy BTCBUSD 20.0 1.0", "expected ',' or ']' at position 23, found end of string"),
+        ("buy BTCBUSD 20.0 1.0]", "expected end of string at position 20, found ']'"),
+        ("[p " * 10000 + "buy BTCBUSD 20.0 1.0" + "]" * 10000, "orders nested too deeply")
+    ]
+
+    def __init__(self):
+        self.parser = CompleteParser()
+
+    def test_parse(self):
+        order = self.parser.parse("[p buy ATOMBUSD 20.0 10.0, [s buy ADABUSD 0.9 10.0, sell ADABUSD 1.5 10.0 when above 1.4]]")
+        assert str(order) == "[parallel buy ATOMBUSD 20.0 10.0, [sequent buy ADABUSD 0.9 10.0, sell ADABUSD 1.5 10.0 when above 1.4]]"
+        print("Parsed order:", order)
+
+    def test_error_positions(self):
+        for order_string, message in ParserTest.ERRORS:
+            try:
+                self.parser.parse(order_string)
+            except InvalidString as invalid_string:
+                assert invalid_string.message == message, f"""{order_string[:40]}: {invalid_string.message}"""
+                print("Rejected:", order_string[:40], "-", invalid_string.message)
+            else:
+                raise AssertionError(f"""{order_string[:40]}: accepted""")
+
+    def test_batch_line_numbers(self):
+        lines = ["# comment", "buy BTCBUSD 20.0 1.0", "", "sell BTCBUSD 20.0"]
+        try:
+            self.parser.parse_batch(lines)
+        except InvalidString as invalid_string:
+            assert invalid_string.message == "line 4: expected quantity at position 17, found end of string", invalid_string.message
+            print("Rejected batch:", invalid_string.message)
+        else:
+            raise AssertionError("batch accepted")
+
+
+if __name__ == '__main__':
+    test = ParserTest()
+    test.test_parse()
+    test.test_error_positions()
+    test.test_batch_line_numbers()
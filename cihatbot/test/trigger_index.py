@@ -0,0 +1,59 @@
+from cihatbot.execution_order.execution_order import SingleExecutionOrder, ExecutionParams, ExecutionConditions, OrderStatus
+from cihatbot.execution_order.trigger_index import TriggerIndex
+from cihatbot.connector.simulated import SimulatedConnector, SimulatedMarket
+from cihatbot.events import TickerEvent
+from cihatbot.trader.real import RealTrader
+import time
+
+
+class TriggerIndexTest:
+
+    @staticmethod
+    def single(price_below: float = 0, price_above: float = 0) -> SingleExecutionOrder:
+        return SingleExecutionOrder(0, ExecutionParams("buy", "ADABUSD", 1.0, 1.0), ExecutionConditions(price_below, price_above))
+
+    def test_add(self):
+        triggers = TriggerIndex()
+        assert triggers.add(self.single(price_below=5.0), 10.0)
+        assert triggers.add(self.single(price_above=5.0), 4.0)
+        assert triggers.add(self.single(price_below=5.0), None)
+        assert not triggers.add(self.single(price_below=5.0), 4.0)
+        assert not triggers.add(self.single(price_above=5.0), 6.0)
+        assert not triggers.add(self.single(price_below=6.0, price_above=4.0), 5.0)
+        assert len(triggers) == 3
+        assert len(triggers.pop("ADABUSD", 5.0)) == 3
+        print("Parked orders popped at 5.0")
+
+    def test_price_moves_before_wait(self):
+        """ The price meets the bound between the satisfied check and the parking of the order """
+
+        market = SimulatedMarket()
+        market.prices.update("ADABUSD", 10.0, 0.0, time.time())
+        connector = SimulatedConnector(market)
+        trader = RealTrader({}, connector)
+        trader.emit = lambda event: None
+        trader.connected = True
+
+        satisfied = connector.satisfied
+
+        def satisfied_then_move(order: SingleExecutionOrder) -> bool:
+            result = satisfied(order)
+            market.prices.update("ADABUSD", 4.0, 0.0, time.time())
+            return result
+
+        connector.satisfied = satisfied_then_move
+        order = self.single(price_below=5.0)
+        trader.execution_order = trader.execution_order.add_parallel(order)
+        trader.submit_next()
+        assert order.status == OrderStatus.PENDING and len(trader.triggers) == 0, order.status
+
+        connector.satisfied = satisfied
+        trader.on_event(TickerEvent(["ADABUSD"]))
+        assert order.status == OrderStatus.SUBMITTED, order.status
+        print("Order submitted on the next tick:", order)
+
+
+if __name__ == '__main__':
+    test = TriggerIndexTest()
+    test.test_add()
+    test.test_price_moves_before_wait()
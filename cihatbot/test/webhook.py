@@ -0,0 +1,79 @@
+from cihatbot.ui.webhook import WebhookServer
+from typing import Dict, List
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import json
+
+
+class WebhookTest:
+    """ Posts recorded Telegram updates to a local WebhookServer, no network access or bot token needed """
+
+    TOKEN = "123456:TEST"
+    UPDATES: List[Dict] = [
+        {
+            "update_id": 100000001,
+            "message": {
+                "message_id": 1,
+                "date": 1620000000,
+                "chat": {"id": 42, "type": "private", "username": "trader"},
+                "from": {"id": 42, "is_bot": False, "first_name": "Trader", "username": "trader"},
+                "text": "/exec buy BTCBUSD 50000.0 0.001",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 5}]
+            }
+        },
+        {
+            "update_id": 100000002,
+            "message": {
+                "message_id": 2,
+                "date": 1620000001,
+                "chat": {"id": 42, "type": "private", "username": "trader"},
+                "from": {"id": 42, "is_bot": False, "first_name": "Trader", "username": "trader"},
+                "text": "/delete 0123456789abcdef",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 7}]
+            }
+        }
+    ]
+
+    def __init__(self):
+        self.server = WebhookServer("127.0.0.1", 0)
+        self.updates: List[Dict] = []
+        self.server.register(WebhookTest.TOKEN, self.handle)
+        self.server.start()
+
+    def handle(self, update: Dict):
+        if "message" not in update:
+            raise KeyError("message")
+        self.updates.append(update)
+
+    def post(self, path: str, body: bytes) -> int:
+        host, port = self.server.address()
+        request = Request(f"""http://{host}:{port}{path}""", data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(request, timeout=5) as response:
+                return response.status
+        except HTTPError as error:
+            return error.code
+
+    def test_updates(self):
+        for update in WebhookTest.UPDATES:
+            assert self.post(f"""/{WebhookTest.TOKEN}""", json.dumps(update).encode()) == 200
+        assert [update["update_id"] for update in self.updates] == [100000001, 100000002]
+        print("Dispatched updates:", [update["message"]["text"] for update in self.updates])
+
+    def test_errors(self):
+        assert self.post("/unknown", json.dumps(WebhookTest.UPDATES[0]).encode()) == 404
+        assert self.post(f"""/{WebhookTest.TOKEN}""", b"{not json") == 400
+        assert self.post(f"""/{WebhookTest.TOKEN}""", json.dumps({"update_id": 100000003, "poll": {}}).encode()) == 200
+        assert self.post(f"""/{WebhookTest.TOKEN}""", json.dumps(WebhookTest.UPDATES[0]).encode()) == 200
+        assert len(self.updates) == 3
+        print("Unknown token, invalid body and failing handler answered, server still serving")
+
+    def stop(self):
+        self.server.stop()
+
+
+if __name__ == '__main__':
+    test = WebhookTest()
+    test.test_updates()
+    test.test_errors()
+    test.stop()
@@ -17,72 +17,163 @@ from cihatbot.events import (
 )
 from cihatbot.trader.trader import Trader
 from cihatbot.execution_order.execution_order import ExecutionOrder, EmptyExecutionOrder, SingleExecutionOrder, OrderStatus
+from cihatbot.execution_order.trigger_index import TriggerIndex
+from cihatbot.execution_order.deadline_index import DeadlineIndex
+from cihatbot.execution_order.journal import Journal, EmptyJournal
 from cihatbot.connector.connector import Connector, ConnectorException
 from cihatbot.util.timer import Timer
-from typing import Dict
+from typing import Callable, Dict, List, Type
 import logging
+import time
 
 
 class RealTrader(Trader):
 
-    TIMER_INTERVAL = 0.02
-
     def __init__(self, config: Dict, connector: Connector) -> None:
         super().__init__(config, connector)
 
         self.logger: Logger = Logger(__name__, logging.INFO)
         self.execution_order: ExecutionOrder = EmptyExecutionOrder()
         self.timer: Timer = Timer()
+        self.triggers: TriggerIndex = TriggerIndex()
+        self.deadlines: DeadlineIndex = DeadlineIndex()
+        self.cancels: DeadlineIndex = DeadlineIndex()
+        self.reconcile_at: float = 0.0
+        self.connected: bool = False
+        self.journal: Journal = Journal(config["journal"]) if config.get("journal") else EmptyJournal()
 
     def pre_run(self) -> None:
         self.connector.add_listener(self.listener)
         self.timer.add_listener(self.listener)
+        self.recover()
+
+    def recover(self) -> None:
+        self.execution_order = self.journal.replay()
+        self.journal.start()
+        self.timer.schedule(time.time() + Journal.SNAPSHOT_INTERVAL)
+        self.logger.log(logging.INFO, f"""Recovered {sum(1 for _ in self.execution_order.singles())} orders from journal""")
+
+    def get_handlers(self) -> Dict[Type[Event], Callable[[Event], None]]:
+        return {
+            ConnectEvent: self.connect,
+            AddEvent: self.add_order,
+            DeleteEvent: self.delete_order,
+            UserEvent: self.update_order,
+            TickerEvent: self.on_ticker,
+            TimerEvent: self.on_timer
+        }
 
     def on_event(self, event: Event) -> None:
-        if event.is_type(ConnectEvent):
-            self.connect(event)
-        elif event.is_type(AddEvent):
-            self.add_order(event)
-        elif event.is_type(DeleteEvent):
-            self.delete_order(event)
-        elif event.is_type(UserEvent) and event.data["status"] == Connector.ORDER_STATUS_FILLED:
-            self.remove_filled(event.data["external_id"])
-        elif event.is_type(UserEvent) and event.data["status"] == Connector.ORDER_STATUS_CANCELED:
-            self.remove_cancelled(event.data["external_id"])
-        elif event.is_type(TickerEvent) or event.is_type(TimerEvent):
-            self.submit_next()
+        handler = self.handlers.get(type(event))
+        if not handler:
+            return
+        handler(event)
+        self.submit_next()
+        self.checkpoint()
 
     def post_run(self):
         self.connector.stop_listen()
         self.timer.stop()
+        self.journal.close()
 
     def connect(self, event: Event) -> None:
-        user = event.data["user"]
-        password = event.data["password"]
+        user = event.user
+        password = event.password
 
         self.logger.log(logging.INFO, f"""CONNECT event: {user}""")
         self.connector.connect(user, password)
         self.connector.start_listen()
-        self.timer.start(RealTrader.TIMER_INTERVAL)
-        self.emit(ConnectedEvent({"user": user}))
+        self.timer.start()
+        self.connected = True
+        self.emit(ConnectedEvent(user))
+        self.reconcile()
+
+    def reconcile(self) -> None:
+        """ Catches up with the fills and cancels missed while disconnected, they come back as UserEvents """
+
+        submitting = []
+        submitted = []
+        for order in self.execution_order.singles():
+            if order.status == OrderStatus.SUBMITTING:
+                submitting.append(order)
+            elif order.status == OrderStatus.SUBMITTED:
+                submitted.append(order)
+
+        if submitting:
+            self.resolve(submitting)
+        if not submitted:
+            return
+
+        self.logger.log(logging.INFO, f"""Reconciling {len(submitted)} submitted orders""")
+        for exception in self.connector.reconcile(submitted):
+            if exception.retry_in:
+                self._retry_reconcile(exception.retry_in)
+                continue
+            self.logger.log(logging.INFO, f"""Connector error on reconcile: {exception.order} - {exception.message}""")
+            self.emit(ErrorEvent(exception.order.snapshot(), exception.message))
+
+    def resolve(self, orders: List[SingleExecutionOrder]) -> None:
+        """ Finds out by their client order id whether the orders left SUBMITTING by a crash reached the exchange """
+
+        self.logger.log(logging.INFO, f"""Resolving {len(orders)} orders of an interrupted submission""")
+        for order, result in zip(orders, self.connector.lookup(orders)):
+
+            if isinstance(result, ConnectorException) and result.retry_in:
+                self._retry_reconcile(result.retry_in)
+
+            elif isinstance(result, ConnectorException):
+                self.logger.log(logging.INFO, f"""Connector error on lookup: {result.order} - {result.message}""")
+                self.emit(ErrorEvent(result.order.snapshot(), result.message))
+
+            elif result is None:
+                self.execution_order.update(order.order_id, OrderStatus.PENDING, 0)
+                self.journal.submit(order, OrderStatus.PENDING)
+
+            else:
+                external_id, status = result
+                self.execution_order.update(order.order_id, OrderStatus.SUBMITTED, external_id)
+                self.journal.submit(order, OrderStatus.SUBMITTED)
+                if status == Connector.ORDER_STATUS_FILLED:
+                    self.remove_filled(external_id)
+                elif status == Connector.ORDER_STATUS_CANCELED:
+                    self.remove_cancelled(external_id)
+                else:
+                    self.emit(SubmittedEvent(self.execution_order.snapshot(), order.snapshot()))
+
+    def _retry_reconcile(self, retry_in: float) -> None:
+        self.reconcile_at = max(self.reconcile_at, time.time() + retry_in)
+        self.timer.schedule(self.reconcile_at)
+
+    def checkpoint(self) -> None:
+        """ Snapshots the tree so the journal can be compacted, the writing happens in the background """
+
+        if not self.journal.needs_snapshot():
+            return
+        self.journal.checkpoint(self.execution_order.snapshot())
+        self.timer.schedule(time.time() + Journal.SNAPSHOT_INTERVAL)
+        self.logger.log(logging.INFO, f"""Journal checkpoint at segment {self.journal.segment}""")
 
     def add_order(self, event: Event) -> None:
-        order = event.data["order"]
-        mode = event.data["mode"]
+        orders = event.orders
+        mode = event.mode
 
-        self.logger.log(logging.INFO, f"""ADD event: {order}""")
+        if not orders:
+            return
+        self.logger.log(logging.INFO, f"""ADD event: {orders[0] if len(orders) == 1 else f"{len(orders)} orders"}""")
+        self.journal.add(orders, mode)
         if mode == "parallel":
-            self.execution_order = self.execution_order.add_parallel(order)
+            self.execution_order = self.execution_order.add_parallel_all(orders)
         elif mode == "sequent":
-            self.execution_order = self.execution_order.add_sequential(order)
-        self.emit(AddedEvent({"all": self.execution_order, "single": order}))
+            self.execution_order = self.execution_order.add_sequential_all(orders)
+        self.emit(AddedEvent(self.execution_order.snapshot(), tuple(order.snapshot() for order in orders)))
 
     def delete_order(self, event: Event) -> None:
-        order_id = event.data["order_id"]
+        order_id = event.order_id
 
         self.logger.log(logging.INFO, f"""DELETE event: {order_id}""")
-        self.execution_order = self.execution_order.cancel(order_id=order_id)
-        self.emit(DeletedEvent({"all": self.execution_order, "order_id": order_id}))
+        self.journal.delete(order_id)
+        self.execution_order = self.execution_order.cancel(self._cancel, order_id=order_id)
+        self.emit(DeletedEvent(self.execution_order.snapshot(), order_id))
 
     def _cancel(self, order: SingleExecutionOrder) -> None:
         if order.status == OrderStatus.SUBMITTED:
@@ -92,23 +183,96 @@ class RealTrader(Trader):
         try:
             self.connector.cancel(order)
         except ConnectorException as exception:
+            if exception.retry_in:
+                self._defer(self.cancels, order, exception.retry_in)
+                return
             self.logger.log(logging.INFO, f"""Connector error on cancel: {exception.order} - {exception.message}""")
-            self.emit(ErrorEvent({"order": exception.order, "message": exception.message}))
+            self.emit(ErrorEvent(exception.order.snapshot(), exception.message))
+
+    def update_order(self, event: Event) -> None:
+        status = event.status
+        external_id = event.external_id
+
+        if status == Connector.ORDER_STATUS_FILLED:
+            self.remove_filled(external_id)
+        elif status == Connector.ORDER_STATUS_CANCELED:
+            self.remove_cancelled(external_id)
+
+    def on_ticker(self, event: Event) -> None:
+        self.trigger(event.symbols)
+
+    def on_timer(self, event: Event) -> None:
+        now = time.time()
+        for order in self.deadlines.pop(now):
+            self.execution_order.wake(order)
+        for order in self.cancels.pop(now):
+            self.execution_order.call(self._cancel, order_id=order.order_id)
+        if self.reconcile_at and self.reconcile_at <= now:
+            self.reconcile_at = 0.0
+            self.reconcile()
+
+    def trigger(self, symbols: List[str]) -> None:
+        for symbol in symbols:
+            price = self.connector.prices.price(symbol)
+            for order in self.triggers.pop(symbol, price):
+                self.execution_order.wake(order)
 
     def submit_next(self) -> None:
-        self.execution_order.submit(self._submit)
-
-    def _submit(self, order: SingleExecutionOrder) -> OrderStatus:
-
-        if not (self.timer.is_later_than(order.from_time) and self._call_satisfied(order)):
+        if not self.connected:
+            return
+        submitted = self.execution_order.submit(self._submit)
+        if not submitted:
+            return
+        execution_order = self.execution_order.snapshot()
+        for order in submitted:
+            self.emit(SubmittedEvent(execution_order, order.snapshot()))
+
+    def _submit(self, orders: List[SingleExecutionOrder]) -> List[OrderStatus]:
+
+        statuses = {}
+        due = []
+        for order in orders:
+            if not self.timer.is_later_than(order.from_time):
+                statuses[order.order_id] = self._park(order)
+            elif not self._call_satisfied(order):
+                statuses[order.order_id] = self._wait(order)
+            else:
+                due.append(order)
+
+        if due:
+            self.journal.intent(due)
+            self.journal.sync()
+        for order, status in zip(due, self._call_submit_all(due)):
+            statuses[order.order_id] = status
+            self.journal.submit(order, OrderStatus.PENDING if status == OrderStatus.WAITING else status)
+
+        return [statuses[order.order_id] for order in orders]
+
+    def _park(self, order: SingleExecutionOrder) -> OrderStatus:
+        """ Keeps an order that is not due yet out of the ready leaves until the timer reaches its from_time """
+
+        self.deadlines.add(order)
+        self.timer.schedule(order.from_time)
+        return OrderStatus.WAITING
+
+    def _defer(self, deadlines: DeadlineIndex, order: SingleExecutionOrder, retry_in: float) -> OrderStatus:
+        """ Retries a call held back by the rate limits once the timer reaches it, instead of waiting for it """
+
+        self.logger.log(logging.INFO, f"""Rate limited, retrying in {retry_in:.1f}s: {order}""")
+        deadline = time.time() + retry_in
+        deadlines.add(order, deadline)
+        self.timer.schedule(deadline)
+        return OrderStatus.WAITING
+
+    def _wait(self, order: SingleExecutionOrder) -> OrderStatus:
+        """ Parks order until its price bounds are met, or leaves it ready if the price met them since satisfied read it """
+
+        if not order.conditions.has_price():
             return OrderStatus.PENDING
 
-        if not self._call_submit(order):
-            return OrderStatus.REJECTED
-
-        self.logger.log(logging.INFO, f"""Order submitted: {order}""")
-        self.emit(SubmittedEvent({"all": self.execution_order, "single": order}))
-        return OrderStatus.SUBMITTED
+        if not self.triggers.add(order, self.connector.prices.price(order.params.symbol)):
+            return OrderStatus.PENDING
+        return OrderStatus.WAITING
 
     def _call_satisfied(self, order: SingleExecutionOrder) -> bool:
 
@@ -117,38 +281,46 @@ class RealTrader(Trader):
 
         except ConnectorException as exception:
             self.logger.log(logging.INFO, f"""Connector error on satisfied: {exception.order} - {exception.message}""")
-            self.emit(ErrorEvent({"order": exception.order, "message": exception.message}))
+            self.emit(ErrorEvent(exception.order.snapshot(), exception.message))
             return False
 
-    def _call_submit(self, order: SingleExecutionOrder) -> bool:
+    def _call_submit_all(self, orders: List[SingleExecutionOrder]) -> List[OrderStatus]:
 
-        try:
-            order.external_id = self.connector.submit(order)
-            return True
+        if not orders:
+            return []
 
-        except ConnectorException as exception:
-            self.logger.log(logging.INFO, f"""Connector error on submit: {exception.order} - {exception.message}""")
-            self.emit(ErrorEvent({"order": exception.order, "message": exception.message}))
-            return False
+        statuses = []
+        for order, result in zip(orders, self.connector.submit_all(orders)):
+
+            if isinstance(result, ConnectorException) and result.retry_in:
+                statuses.append(self._defer(self.deadlines, order, result.retry_in))
+
+            elif isinstance(result, ConnectorException):
+                self.logger.log(logging.INFO, f"""Connector error on submit: {result.order} - {result.message}""")
+                self.emit(ErrorEvent(result.order.snapshot(), result.message))
+                statuses.append(OrderStatus.REJECTED)
+
+            else:
+                order.external_id = result
+                self.logger.log(logging.INFO, f"""Order submitted: {order}""")
+                statuses.append(OrderStatus.SUBMITTED)
+
+        return statuses
 
     def remove_filled(self, external_id: int) -> None:
+        self.journal.fill(external_id)
         self.execution_order.call(self._signal_filled, external_id=external_id)
         self.execution_order = self.execution_order.remove(external_id=external_id)
 
     def _signal_filled(self, order: SingleExecutionOrder) -> None:
         self.logger.log(logging.INFO, f"""Filled order: {order}""")
-        self.emit(FilledEvent({"all": self.execution_order, "single": order}))
+        self.emit(FilledEvent(self.execution_order.snapshot(), order.snapshot()))
 
     def remove_cancelled(self, external_id: int) -> None:
+        self.journal.cancel(external_id)
         self.execution_order.call(self._signal_cancelled, external_id=external_id)
         self.execution_order = self.execution_order.remove(external_id=external_id)
 
     def _signal_cancelled(self, order: SingleExecutionOrder) -> None:
         self.logger.log(logging.INFO, f"""Cancelled order: {order}""")
-        self.emit(CancelledEvent({"all": self.execution_order, "single": order}))
-
-
-
-
-
-
+        self.emit(CancelledEvent(self.execution_order.snapshot(), order.snapshot()))
@@ -0,0 +1,135 @@
+from cihatbot.logger import Logger
+from cihatbot.util.rate_limit import RateLimit
+from telegram.error import RetryAfter, TelegramError
+from threading import Thread, Condition
+from typing import Callable, Dict, List
+import logging
+import time
+
+
+class Notifier(Thread):
+    """
+    Outbound Telegram messages, sent from their own thread so that the UI never
+    waits on the network. Messages to a chat arriving within DEBOUNCE seconds of
+    the first one are joined into a single message, and sending respects the
+    Telegram limits of one message per second per chat and thirty per second
+    overall, backing off when the server answers with RetryAfter.
+    """
+
+    DEBOUNCE = 0.5
+    CHAT_INTERVAL = 1.0
+    GLOBAL_LIMIT = 30
+    MAX_LENGTH = 4096
+    STOP_TIMEOUT = 5
+
+    def __init__(self, send: Callable[[int, str], None]) -> None:
+        super().__init__(daemon=True)
+
+        self.send: Callable[[int, str], None] = send
+        self.logger: Logger = Logger(__name__, logging.INFO)
+        self.condition: Condition = Condition()
+        self.messages: Dict[int, List[str]] = {}
+        self.due: Dict[int, float] = {}
+        self.global_limit: RateLimit = RateLimit(Notifier.GLOBAL_LIMIT, 1)
+        self.is_running: bool = False
+
+    def notify(self, chat_id: int, message: str) -> None:
+
+        with self.condition:
+            if chat_id not in self.messages:
+                self.messages[chat_id] = []
+                self.due[chat_id] = max(self.due.get(chat_id, 0.0), time.time() + Notifier.DEBOUNCE)
+            self.messages[chat_id].append(message)
+            self.condition.notify()
+
+    def start(self) -> None:
+        self.is_running = True
+        super().start()
+
+    def stop(self) -> None:
+        """ Sends what is still pending, waiting at most STOP_TIMEOUT seconds, then ends the thread """
+
+        with self.condition:
+            self.is_running = False
+            self.condition.notify()
+        if self.is_alive():
+            self.join(Notifier.STOP_TIMEOUT)
+
+    def run(self) -> None:
+
+        while True:
+            with self.condition:
+                chat_id = self._wait_next()
+                if chat_id is None:
+                    return
+                texts = Notifier._split(self.messages.pop(chat_id))
+                now = time.time()
+                self.due[chat_id] = now + Notifier.CHAT_INTERVAL
+                self.global_limit.consume(1, now)
+
+            if not texts:
+                continue
+            if not self._send(chat_id, texts[0]):
+                self._requeue(chat_id, texts)
+            elif len(texts) > 1:
+                self._requeue(chat_id, texts[1:])
+
+    def _wait_next(self):
+        """ Waits until a chat is due and the global limit allows a message, None once stopped and flushed """
+
+        while True:
+            if not self.messages:
+                if not self.is_running:
+                    return None
+                self.condition.wait()
+                continue
+
+            now = time.time()
+            chat_id = min(self.messages, key=lambda chat: self.due[chat])
+            delay = self.due[chat_id] - now
+            if not self.global_limit.available(1, now):
+                delay = max(delay, self.global_limit.reset_in(now))
+            if delay <= 0:
+                return chat_id
+            self.condition.wait(delay)
+
+    def _send(self, chat_id: int, text: str) -> bool:
+        """ Returns False if Telegram asked to retry later, in which case the chat is paused """
+
+        try:
+            self.send(chat_id, text)
+        except RetryAfter as exception:
+            self.logger.log(logging.INFO, f"""Telegram rate limit, retrying in {exception.retry_after}s""")
+            with self.condition:
+                self.due[chat_id] = time.time() + exception.retry_after
+            return False
+        except TelegramError as exception:
+            self.logger.log(logging.INFO, f"""Telegram error on send: {exception.message}""")
+        return True
+
+    def _requeue(self, chat_id: int, texts: List[str]) -> None:
+
+        with self.condition:
+            self.messages[chat_id] = texts + self.messages.get(chat_id, [])
+            self.condition.notify()
+
+    @staticmethod
+    def _split(messages: List[str]) -> List[str]:
+        """ Joins messages line by line into texts no longer than MAX_LENGTH """
+
+        lines = []
+        for message in messages:
+            for line in message.split("\n"):
+                lines.extend(line[start:start + Notifier.MAX_LENGTH] for start in range(0, max(len(line), 1), Notifier.MAX_LENGTH))
+
+        texts = []
+        current = ""
+        for line in lines:
+            if current and len(current) + 1 + len(line) > Notifier.MAX_LENGTH:
+                texts.append(current)
+                current = line
+            else:
+                current = f"""{current}\n{line}""" if current else line
+        if current:
+            texts.append(current)
+        return texts
@@ -13,11 +13,16 @@ from cihatbot.events import (
     ErrorEvent
 )
 from cihatbot.ui.ui import Ui
+from cihatbot.ui.notifier import Notifier
+from cihatbot.ui.webhook import WebhookServer
 from cihatbot.parser.parser import Parser, InvalidString
-from typing import Dict
+from typing import Callable, Dict, Iterable, Type
 from telegram import Update
-from telegram.ext import Updater, CommandHandler, Filters, CallbackContext
+from telegram.error import TelegramError
+from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext
+from io import BytesIO, TextIOWrapper
 import logging
+import os
 
 
 HELP_MESSAGE = f"""
@@ -36,7 +41,15 @@ User following commands to start trading:
     to buy at multiple prices
     example: /exec BTCBUSD buy 0.0002 at 55000, 0.0003 at 50000 and sell 100% at 70000
 
-Other commands such as /exec_after and /delete are to be documented.
+/exec SYMBOL buy QUANTITY at PRICE when above PRICE and sell PERCENTS at PRICE when below PRICE
+    to wait for the market price to reach a level before submitting an order
+    example: /exec BTCBUSD buy 0.0002 at 0 when above 60000 and sell 100% at 0 when below 58000
+
+/import PATH
+    to add every order of a file in the import directory of the bot host, one order per line
+    send a document instead to import the file it contains, with /exec_after as caption to add it after the others
+
+Other commands such as /exec_after, /import_after and /delete are to be documented.
 
 Created by 
 Grigoriy Rebinskiy
@@ -45,15 +58,20 @@ me@gregrebin.com """
 
 class Telegram(Ui):
 
-    def __init__(self, config: Dict, parser: Parser):
-        super().__init__(config, parser)
+    SUMMARY_ORDERS = 10
+
+    def __init__(self, config: Dict, parser: Parser, webhook: WebhookServer = None):
+        super().__init__(config, parser, webhook)
 
         self.user = self.config["user"]
         self.updater = Updater(self.config["token"])
         self.dispatcher = self.updater.dispatcher
         self.bot = self.updater.bot
+        self.notifier = Notifier(self.bot.send_message)
         self.logger = Logger(__name__, logging.INFO)
 
+        self.import_dir = os.path.realpath(self.config["import_dir"]) if self.config.get("import_dir") else None
+
         if "chat_id" in self.config:
             self.chat_id = self.config["chat_id"]
         else:
@@ -64,28 +82,40 @@ class Telegram(Ui):
         self.dispatcher.add_handler(CommandHandler("exec", self.add_parallel_handler, filters=Filters.user(username=self.user)))
         self.dispatcher.add_handler(CommandHandler("exec_after", self.add_sequent_handler, filters=Filters.user(username=self.user)))
         self.dispatcher.add_handler(CommandHandler("delete", self.delete_handler, filters=Filters.user(username=self.user)))
+        self.dispatcher.add_handler(CommandHandler("import", self.import_parallel_handler, filters=Filters.user(username=self.user)))
+        self.dispatcher.add_handler(CommandHandler("import_after", self.import_sequent_handler, filters=Filters.user(username=self.user)))
+        self.dispatcher.add_handler(MessageHandler(Filters.document & Filters.user(username=self.user), self.import_document_handler))
 
     def pre_run(self) -> None:
-        self.updater.start_polling()
+        self.notifier.start()
+        if self.webhook:
+            self.webhook.register(self.config["token"], self.process_update)
+            if self.config.get("webhook_url"):
+                self.bot.set_webhook(f"""{self.config["webhook_url"].rstrip("/")}/{self.config["token"]}""")
+        else:
+            self.updater.start_polling()
 
     def post_run(self) -> None:
-        self.updater.stop()
-
-    def on_event(self, event: Event) -> None:
-        if event.is_type(ConnectedEvent):
-            self.notify_connected(event)
-        elif event.is_type(AddedEvent):
-            self.notify_added(event)
-        elif event.is_type(DeletedEvent):
-            self.notify_deleted(event)
-        elif event.is_type(SubmittedEvent):
-            self.notify_submitted(event)
-        elif event.is_type(FilledEvent):
-            self.notify_filled(event)
-        elif event.is_type(CancelledEvent):
-            self.notify_cancelled(event)
-        elif event.is_type(ErrorEvent):
-            self.notify_error(event)
+        if self.webhook:
+            self.webhook.unregister(self.config["token"])
+        else:
+            self.updater.stop()
+        self.notifier.stop()
+
+    def process_update(self, data: Dict) -> None:
+        """ Runs the command handlers on an update pushed to the webhook server """
+        self.dispatcher.process_update(Update.de_json(data, self.bot))
+
+    def get_handlers(self) -> Dict[Type[Event], Callable[[Event], None]]:
+        return {
+            ConnectedEvent: self.notify_connected,
+            AddedEvent: self.notify_added,
+            DeletedEvent: self.notify_deleted,
+            SubmittedEvent: self.notify_submitted,
+            FilledEvent: self.notify_filled,
+            CancelledEvent: self.notify_cancelled,
+            ErrorEvent: self.notify_error
+        }
 
     def help_handler(self, update: Update, _: CallbackContext) -> None:
         self._update_chat_id(update.message.chat_id)
@@ -100,7 +130,7 @@ class Telegram(Ui):
         user, password = message.split()
 
         self.logger.log(logging.INFO, f"""Connect trader: {user} - {password}""")
-        self.emit(ConnectEvent({"user": user, "password": password}))
+        self.emit(ConnectEvent(user, password))
 
     def add_parallel_handler(self, update: Update, _: CallbackContext) -> None:
         self._update_chat_id(update.message.chat_id)
@@ -117,16 +147,72 @@ class Telegram(Ui):
         try:
             order = self.parser.parse(message)
         except InvalidString as invalid_string:
-            self._send_message(f"""Invalid command: {invalid_string.order_string}""")
+            reason = f""" - {invalid_string.message}""" if invalid_string.message else ""
+            self._send_message(f"""Invalid command: {invalid_string.order_string}{reason}""")
             return
         self.logger.log(logging.INFO, f"""New execution order: {order}""")
-        self.emit(AddEvent({"order": order, "mode": mode}))
+        self.emit(AddEvent([order], mode))
+
+    def import_parallel_handler(self, update: Update, _: CallbackContext) -> None:
+        self._update_chat_id(update.message.chat_id)
+        self._import_file(update.message.text.partition(" ")[2].strip(), "parallel")
+
+    def import_sequent_handler(self, update: Update, _: CallbackContext) -> None:
+        self._update_chat_id(update.message.chat_id)
+        self._import_file(update.message.text.partition(" ")[2].strip(), "sequent")
+
+    def import_document_handler(self, update: Update, _: CallbackContext) -> None:
+        self._update_chat_id(update.message.chat_id)
+        document = update.message.document
+        mode = "sequent" if (update.message.caption or "").strip() == "/exec_after" else "parallel"
+        self.logger.log(logging.INFO, f"""Received import document: {document.file_name}""")
+
+        buffer = BytesIO()
+        try:
+            document.get_file().download(out=buffer)
+        except TelegramError as exception:
+            self._send_message(f"""Cannot download {document.file_name}: {exception.message}""")
+            return
+        buffer.seek(0)
+        self._import_orders(TextIOWrapper(buffer, encoding="utf-8", errors="replace"), document.file_name, mode)
+
+    def _import_file(self, path: str, mode: str) -> None:
+        """ Only reads files under import_dir, after resolving symbolic links and relative components """
+
+        self.logger.log(logging.INFO, f"""Received import file: {path}""")
+        if self.import_dir is None:
+            self._send_message("Importing files from the bot host is disabled, send the file as a document instead")
+            return
+
+        full_path = os.path.realpath(os.path.join(self.import_dir, path))
+        if not os.path.commonpath([self.import_dir, full_path]) == self.import_dir:
+            self.logger.log(logging.WARNING, f"""Refused import outside of {self.import_dir}: {path}""")
+            self._send_message(f"""Cannot read {path}: not in the import directory""")
+            return
+
+        try:
+            with open(full_path, "r", encoding="utf-8", errors="replace") as file:
+                self._import_orders(file, path, mode)
+        except OSError as exception:
+            self._send_message(f"""Cannot read {path}: {exception.strerror}""")
+
+    def _import_orders(self, lines: Iterable[str], source: str, mode: str) -> None:
+        """ Streams the lines through the parser and adds them in one batch, or none if any line is invalid """
+
+        try:
+            orders = self.parser.parse_batch(lines)
+        except InvalidString as invalid_string:
+            reason = "\n".join(text for text in (invalid_string.order_string, invalid_string.message) if text)
+            self._send_message(f"""Invalid import {source}: {reason}""")
+            return
+        self.logger.log(logging.INFO, f"""Imported {len(orders)} execution orders from {source}""")
+        self.emit(AddEvent(orders, mode))
 
     def delete_handler(self, update: Update, _: CallbackContext) -> None:
         self._update_chat_id(update.message.chat_id)
         order_id = update.message.text.lstrip("/delete ")
         self.logger.log(logging.INFO, f"""Received delete message: {order_id}""")
-        self.emit(DeleteEvent({"order_id": order_id}))
+        self.emit(DeleteEvent(order_id))
 
     def _update_chat_id(self, chat_id: int):
         if not self.chat_id == chat_id:
@@ -134,42 +220,54 @@ class Telegram(Ui):
             self.chat_id = chat_id
 
     def notify_connected(self, event: Event) -> None:
-        user = event.data["user"]
+        user = event.user
         self.logger.log(logging.INFO, f"""CONNECTED event: {user}""")
         self._send_message(f"""Connected to user: {user}""")
 
     def notify_added(self, event: Event) -> None:
-        order = event.data["single"]
-        self.logger.log(logging.INFO, f"""ADDED event: {order}""")
-        self._send_message(f"""Added order: {order}""")
+        orders = event.orders
+        self.logger.log(logging.INFO, f"""ADDED event: {len(orders)} orders""")
+        count = sum(Telegram._count_singles(order) for order in orders)
+        if count > Telegram.SUMMARY_ORDERS:
+            self._send_message(f"""Added {len(orders)} orders, {count} single orders in total""")
+        else:
+            self._send_message("\n".join(f"""Added order: {order}""" for order in orders))
 
     def notify_deleted(self, event: Event) -> None:
-        order_id = event.data["order_id"]
+        order_id = event.order_id
         self.logger.log(logging.INFO, f"""DELETED event: {order_id}""")
         self._send_message(f"""Deleted order: {order_id}""")
 
     def notify_submitted(self, event: Event) -> None:
-        order = event.data["single"]
+        order = event.single
         self.logger.log(logging.INFO, f"""SUBMITTED event: {order}""")
         self._send_message(f"""Submitted order: {order}""")
 
     def notify_filled(self, event: Event) -> None:
-        order = event.data["single"]
+        order = event.single
         self.logger.log(logging.INFO, f"""FILLED event: {order}""")
         self._send_message(f"""Filled order: {order}""")
 
     def notify_cancelled(self, event: Event) -> None:
-        order = event.data["single"]
+        order = event.single
         self.logger.log(logging.INFO, f"""CANCELLED event: {order}""")
         self._send_message(f"""Cancelled order: {order}""")
 
     def notify_error(self, event: Event) -> None:
-        order = event.data["order"]
-        message = event.data["message"]
+        order = event.order
+        message = event.message
         self.logger.log(logging.INFO, f"""ERROR event: {order}""")
         self._send_message(f"""Error on order: {order} - {message}""")
 
+    @staticmethod
+    def _count_singles(order) -> int:
+        if order.order_type == "single":
+            return 1
+        elif order.order_type == "empty":
+            return 0
+        return sum(Telegram._count_singles(child) for child in order.orders)
+
     def _send_message(self, message: str):
         if self.chat_id:
-            self.bot.send_message(self.chat_id, message)
+            self.notifier.notify(self.chat_id, message)
 
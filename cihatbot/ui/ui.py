@@ -1,11 +1,13 @@
 from cihatbot.module import Module
 from cihatbot.parser.parser import Parser
-from typing import Dict
+from cihatbot.ui.webhook import WebhookServer
+from typing import Dict, Optional
 
 
 class Ui(Module):
 
-    def __init__(self, config: Dict, parser: Parser):
+    def __init__(self, config: Dict, parser: Parser, webhook: WebhookServer = None):
         super().__init__(config)
 
         self.parser: Parser = parser
+        self.webhook: Optional[WebhookServer] = webhook
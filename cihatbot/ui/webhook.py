@@ -0,0 +1,86 @@
+from cihatbot.logger import Logger
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from typing import Callable, Dict, Tuple
+import json
+import logging
+
+
+class WebhookServer:
+    """
+    Local HTTP server receiving the updates Telegram pushes to https://HOST/TOKEN,
+    shared by all users: each UI registers its bot token and the handler of its
+    updates. Any client can post recorded updates to it, which makes it testable
+    without Telegram.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        self.routes: Dict[str, Callable[[Dict], None]] = {}
+        self.logger: Logger = Logger(__name__, logging.INFO)
+        self.server: ThreadingHTTPServer = ThreadingHTTPServer((host, port), WebhookServer._request_handler(self))
+        self.server.daemon_threads = True
+        self.thread: Thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    def register(self, token: str, handler: Callable[[Dict], None]) -> None:
+        self.routes = {**self.routes, token: handler}
+
+    def unregister(self, token: str) -> None:
+        self.routes = {route: handler for route, handler in self.routes.items() if not route == token}
+
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self) -> None:
+        self.logger.log(logging.INFO, f"""Webhook server listening on {self.address()}""")
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread.is_alive():
+            self.server.shutdown()
+            self.thread.join()
+        self.server.server_close()
+
+    def dispatch(self, path: str, body: bytes) -> int:
+        """
+        Hands the update posted to path to the handler of its token, returns the HTTP
+        status. An update the handler fails on is logged and acknowledged all the same,
+        Telegram would otherwise keep redelivering it.
+        """
+
+        handler = self.routes.get(path.strip("/"))
+        if handler is None:
+            return 404
+
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return 400
+
+        try:
+            handler(update)
+        except Exception as exception:
+            self.logger.log(logging.ERROR, f"""Webhook handler failed: {exception!r}""")
+        return 200
+
+    @staticmethod
+    def _request_handler(webhook: "WebhookServer"):
+
+        class RequestHandler(BaseHTTPRequestHandler):
+
+            def do_POST(self) -> None:
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                except ValueError:
+                    self._respond(400)
+                    return
+                self._respond(webhook.dispatch(self.path, self.rfile.read(length)))
+
+            def _respond(self, status: int) -> None:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, message_format: str, *args) -> None:
+                pass
+
+        return RequestHandler
@@ -4,16 +4,20 @@ from cihatbot.scheduler import Scheduler
 from cihatbot.events import Event, EventListener, EventEmitter, AddUiEvent, AddTraderEvent
 from cihatbot.ui.ui import Ui
 from cihatbot.ui.telegram import Telegram
+from cihatbot.ui.webhook import WebhookServer
 from cihatbot.parser.parser import Parser
 from cihatbot.parser.complete_parser import CompleteParser
 from cihatbot.parser.simple_parser import SimpleParser
 from cihatbot.trader.trader import Trader
 from cihatbot.trader.real import RealTrader
 from cihatbot.connector.connector import Connector
-from cihatbot.connector.binance import BinanceConnector
+from cihatbot.connector.market import Market
+from cihatbot.connector.binance import BinanceConnector, BinanceMarket
+from cihatbot.connector.async_binance import AsyncBinanceConnector
+from cihatbot.connector.simulated import SimulatedConnector, SimulatedMarket
 from configparser import ConfigParser
 from threading import Thread
-from typing import Type, Dict, List
+from typing import Callable, Type, Dict, List, Optional
 import logging
 
 
@@ -33,37 +37,60 @@ TRADERS: Dict[str, Type[Trader]] = {
 }
 
 CONNECTORS: Dict[str, Type[Connector]] = {
-    "binance-connector": BinanceConnector
+    "binance-connector": BinanceConnector,
+    "async-binance-connector": AsyncBinanceConnector,
+    "simulated-connector": SimulatedConnector
+}
+
+""" Exchange each connector trades on, connectors of the same exchange share its market data """
+EXCHANGES: Dict[str, str] = {
+    "binance-connector": "binance",
+    "async-binance-connector": "binance",
+    "simulated-connector": "simulated"
+}
+
+""" Market data implementation classes, one instance per exchange """
+MARKETS: Dict[str, Type[Market]] = {
+    "binance": BinanceMarket,
+    "simulated": SimulatedMarket
 }
 
 
 class User(Thread):
 
-    def __init__(self, app_listener: EventListener, default_config: ConfigParser) -> None:
+    def __init__(self, app_listener: EventListener, default_config: ConfigParser, get_market: Callable[[str], Market], webhook: WebhookServer = None) -> None:
         super().__init__()
 
         self.uis: List[Ui] = []
         self.traders: List[Trader] = []
 
         self.app_listener: EventListener = app_listener
-        self.listener: EventListener = EventListener()
+        self.handlers: Dict[Type[Event], Callable[[Event], None]] = {
+            AddTraderEvent: self.on_add_trader,
+            AddUiEvent: self.on_add_ui
+        }
+        self.listener: EventListener = EventListener(self.handlers)
 
         self.scheduler: Scheduler = Scheduler()
+        self.get_market: Callable[[str], Market] = get_market
+        self.webhook: Optional[WebhookServer] = webhook
 
         self.default_config: ConfigParser = default_config
         self.logger: Logger = Logger(__name__, logging.INFO)
 
         self.logger.log(logging.INFO, f"""New user initialized""")
 
-    def add_ui(self, ui_name: str, parser_name: str, config: Dict = None) -> Ui:
+    def add_ui(self, ui_name: str, parser_name: str, config: Dict = None, connector_name: str = None) -> Ui:
 
         ui_class = UIS[ui_name]
         parser_class = PARSERS[parser_name]
 
         if not config:
             config = dict(self.default_config[ui_name])
-        parser = parser_class()
-        ui = ui_class(config, parser)
+        if not connector_name:
+            connector_name = self.default_config["app"]["connector"]
+        parser = parser_class(self.get_market(connector_name).filters)
+        ui = ui_class(config, parser, self.webhook)
 
         for trader in self.traders:
             trader.add_listener(ui.listener)
@@ -84,7 +111,7 @@ class User(Thread):
 
         if not config:
             config = dict(self.default_config[trader_name])
-        connector = connector_class()
+        connector = connector_class(self.get_market(connector_name))
         trader = trader_class(config, connector)
 
         for ui in self.uis:
@@ -107,11 +134,15 @@ class User(Thread):
 
     def on_event(self, event: Event) -> None:
 
-        if event.is_type(AddTraderEvent):
-            self.add_trader(event.data["trader_name"], event.data["connector_name"], event.data["config"])
+        handler = self.handlers.get(type(event))
+        if handler:
+            handler(event)
+
+    def on_add_trader(self, event: Event) -> None:
+        self.add_trader(event.trader_name, event.connector_name, event.config)
 
-        elif event.is_type(AddUiEvent):
-            self.add_ui(event.data["ui_name"], event.data["parser_name"], event.data["config"])
+    def on_add_ui(self, event: Event) -> None:
+        self.add_ui(event.ui_name, event.parser_name, event.config)
 
     def stop(self):
 
@@ -0,0 +1,31 @@
+class RateLimit:
+    """ Usage of a limit counted over fixed windows of interval seconds, like Binance counts its own """
+
+    def __init__(self, limit: int, interval: float) -> None:
+        self.limit: int = limit
+        self.interval: float = interval
+        self.window: int = 0
+        self.used: int = 0
+
+    def available(self, cost: int, now: float, share: float = 1.0) -> bool:
+        """ Whether cost fits in the given share of the limit """
+        self._roll(now)
+        return self.used + cost <= self.limit * share
+
+    def consume(self, cost: int, now: float) -> None:
+        self._roll(now)
+        self.used += cost
+
+    def sync(self, used: int, now: float) -> None:
+        """ Takes the usage reported by the exchange, which also counts other clients of the same key or IP """
+        self._roll(now)
+        self.used = max(self.used, used)
+
+    def reset_in(self, now: float) -> float:
+        return (int(now // self.interval) + 1) * self.interval - now
+
+    def _roll(self, now: float) -> None:
+        window = int(now // self.interval)
+        if not window == self.window:
+            self.window = window
+            self.used = 0
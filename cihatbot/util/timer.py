@@ -1,5 +1,7 @@
 from cihatbot.events import EventEmitter, EventListener, TimerEvent
-from threading import Thread
+from threading import Thread, Condition
+from typing import List
+import heapq
 import time
 
 
@@ -8,25 +10,51 @@ class Timer:
     def __init__(self) -> None:
         self.emitter: EventEmitter = EventEmitter()
         self.thread: Thread = Thread()
+        self.condition: Condition = Condition()
+        self.deadlines: List[float] = []
         self.is_running: bool = False
 
     def add_listener(self, listener: EventListener) -> None:
         self.emitter.add_listener(listener)
 
-    def start(self, interval: float):
+    def schedule(self, deadline: float) -> None:
+        with self.condition:
+            heapq.heappush(self.deadlines, deadline)
+            if self.deadlines[0] == deadline:
+                self.condition.notify()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
         self.is_running = True
+        self.thread = Thread(target=self._run)
+        self.thread.start()
 
-        def run():
-            while self.is_running:
-                time.sleep(interval)
-                self.emitter.emit(TimerEvent({}))
+    def _run(self) -> None:
+        while self._wait_next():
+            self.emitter.emit(TimerEvent())
 
-        self.thread = Thread(target=run)
-        self.thread.start()
+    def _wait_next(self) -> bool:
+        """ Sleeps until the earliest deadline is due, returns False when stopped """
+        with self.condition:
+            while self.is_running:
+                if not self.deadlines:
+                    self.condition.wait()
+                    continue
+                now = time.time()
+                if self.deadlines[0] > now:
+                    self.condition.wait(self.deadlines[0] - now)
+                    continue
+                while self.deadlines and self.deadlines[0] <= now:
+                    heapq.heappop(self.deadlines)
+                return True
+            return False
 
     def stop(self):
         if self.is_running:
-            self.is_running = False
+            with self.condition:
+                self.is_running = False
+                self.condition.notify()
             self.thread.join()
 
     @staticmethod